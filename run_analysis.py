@@ -3,37 +3,48 @@
 Main runner script for the purchase price analysis.
 """
 
+import logging
 import sys
-import os
 from pathlib import Path
 
-# Add src directory to Python path
-sys.path.append(str(Path(__file__).parent / "src"))
+# Add src directory to the front of the Python path so project modules
+# resolve before the rest of sys.path is searched
+sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from price_analyzer import main
+import price_analyzer
 
-if __name__ == "__main__":
-    print("🚀 Starting Purchase Price Analysis...")
-    print("=" * 50)
+# Named explicitly: __name__ is "__main__" when run as a script
+logger = logging.getLogger("run_analysis")
+
+
+def main(data_dir="data", log_path="price_analysis.log"):
+    """Run the analysis on the workbook in data_dir, creating sample data if it is missing."""
+    logger.info("🚀 Starting Purchase Price Analysis...")
+    
+    data_dir = Path(data_dir)
+    excel_path = data_dir / "purchase_price.xlsx"
+    output_path = data_dir / "final_purchase_price.csv"
     
-    # Check if Excel file exists
-    excel_path = "data/purchase_price.xlsx"
-    if not os.path.exists(excel_path):
-        print(f"❌ Excel file not found: {excel_path}")
-        print("📝 Creating sample data for testing...")
+    # Check if Excel file exists (sample data creation is only imported when needed)
+    if not excel_path.is_file():
+        logger.warning("❌ Excel file not found: %s", excel_path)
+        logger.info("📝 Creating sample data for testing...")
         
         # Import and run sample data creation
         from create_sample_data import create_sample_data
-        create_sample_data()
-        print("✅ Sample data created successfully!")
-        print()
+        create_sample_data(data_dir=data_dir, reference=True)
+        logger.info("✅ Sample data created successfully!")
     
     # Run the analysis
     try:
-        main()
-        print("\n✅ Analysis completed successfully!")
-        print(f"📊 Results saved to: data/final_purchase_price.csv")
-        print(f"📋 Log file: price_analysis.log")
+        price_analyzer.main(str(excel_path), str(output_path), str(log_path))
+        logger.info("✅ Analysis completed successfully!")
+        logger.info("📊 Results saved to: %s", output_path)
+        logger.info("📋 Log file: %s", log_path)
     except Exception as e:
-        print(f"❌ Analysis failed: {str(e)}")
+        logger.error("❌ Analysis failed: %s", e)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Provides a single command to run all tests with different options.
 """
 
 import sys
+import shlex
+import importlib.util
 import subprocess
 import argparse
 from pathlib import Path
@@ -16,7 +18,7 @@ def run_command(cmd, description):
     print(f"🧪 {description}")
     print(f"{'='*60}")
     
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    result = subprocess.run(cmd, check=False, capture_output=True, text=True)
     
     print(result.stdout)
     if result.stderr:
@@ -25,6 +27,23 @@ def run_command(cmd, description):
     return result.returncode == 0
 
 
+def xdist_args(serial=False):
+    """pytest arguments that spread test files over all cores, if possible.
+    
+    loadfile keeps each file on one worker so its fixtures and imports are
+    only set up once. Nothing is added when running serially or when
+    pytest-xdist is not installed.
+    """
+    if serial or not has_xdist():
+        return []
+    return ["-n", "auto", "--dist", "loadfile"]
+
+
+def has_xdist():
+    """Check whether pytest-xdist is installed, without importing it."""
+    return importlib.util.find_spec("xdist") is not None
+
+
 def main():
     """Main test runner function."""
     parser = argparse.ArgumentParser(description="Run tests for purchase price analysis project")
@@ -33,17 +52,18 @@ def main():
     parser.add_argument("--coverage", action="store_true", help="Run tests with coverage report")
     parser.add_argument("--html-report", action="store_true", help="Generate HTML coverage report")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
-    parser.add_argument("--fast", action="store_true", help="Skip slow tests")
+    parser.add_argument("--fast", action="store_true", help="Skip slow tests (the default)")
+    parser.add_argument("--all", action="store_true", help="Include slow tests")
     parser.add_argument("--file", help="Run tests in specific file")
+    parser.add_argument("--serial", action="store_true", help="Run tests in a single process (no pytest-xdist)")
     
     args = parser.parse_args()
     
-    # Base pytest command - try python3 first, then python
-    python_cmd = "python3" if subprocess.run(["which", "python3"], capture_output=True).returncode == 0 else "python"
-    base_cmd = f"{python_cmd} -m pytest"
+    # Base pytest command - run with the same interpreter as this script
+    python_cmd = sys.executable
     
     # Build command based on arguments
-    cmd_parts = [base_cmd]
+    cmd_parts = [python_cmd, "-m", "pytest"]
     
     if args.verbose:
         cmd_parts.append("-v")
@@ -61,18 +81,19 @@ def main():
     
     if args.fast:
         cmd_parts.extend(["-m", "not slow"])
+    elif args.all:
+        cmd_parts.extend(["-m", ""])
     
     if args.file:
         cmd_parts.append(f"tests/{args.file}")
     else:
+        # pytest-cov merges the workers' coverage data automatically
+        cmd_parts.extend(xdist_args(args.serial))
         cmd_parts.append("tests/")
     
-    # Join command parts
-    cmd = " ".join(cmd_parts)
-    
     print("🚀 Purchase Price Analysis - Test Runner")
     print("="*60)
-    print(f"Running command: {cmd}")
+    print(f"Running command: {shlex.join(cmd_parts)}")
     
     # Check if pytest is available
     try:
@@ -85,7 +106,7 @@ def main():
         return 1
     
     # Run the tests
-    success = run_command(cmd, "Running Tests")
+    success = run_command(cmd_parts, "Running Tests")
     
     if success:
         print("\n✅ All tests passed successfully!")
@@ -100,21 +121,24 @@ def main():
         return 1
 
 
-def run_all_tests():
+def run_all_tests(serial=False):
     """Convenience function to run all tests with coverage."""
-    cmd = "python -m pytest tests/ --cov=src --cov-report=term-missing --cov-report=html:htmlcov -v"
+    cmd = [sys.executable, "-m", "pytest", "tests/", "-m", "",
+           *xdist_args(serial),
+           "--cov=src", "--cov-report=term-missing", "--cov-report=html:htmlcov", "-v"]
     return run_command(cmd, "Running All Tests with Coverage")
 
 
-def run_unit_tests():
+def run_unit_tests(serial=False):
     """Run only unit tests."""
-    cmd = "python -m pytest tests/test_price_analyzer.py tests/test_create_sample_data.py -v"
+    cmd = [sys.executable, "-m", "pytest", "tests/test_price_analyzer.py",
+           "tests/test_create_sample_data.py", *xdist_args(serial), "-v"]
     return run_command(cmd, "Running Unit Tests")
 
 
 def run_integration_tests():
     """Run only integration tests."""
-    cmd = "python -m pytest tests/test_run_analysis.py -v"
+    cmd = [sys.executable, "-m", "pytest", "tests/test_run_analysis.py", "-v"]
     return run_command(cmd, "Running Integration Tests")
 
 
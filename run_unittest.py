@@ -7,36 +7,70 @@ Works with Python's built-in unittest module without external dependencies.
 import unittest
 import sys
 import os
+import io
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# The project root (for tests.helpers) and src must be importable in this
+# process and in the worker processes; under pytest, tests/conftest.py does this
+PROJECT_ROOT = Path(__file__).parent
+for path in (str(PROJECT_ROOT), str(PROJECT_ROOT / "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
 
-def run_tests():
-    """Run all unit tests using Python's built-in unittest."""
+
+def run_test_file(pattern):
+    """Run the tests of a single test file and return its output and counts."""
+    suite = unittest.TestLoader().discover('tests', pattern=pattern)
+    stream = io.StringIO()
+    result = unittest.TextTestRunner(stream=stream, verbosity=2).run(suite)
+    return stream.getvalue(), result.testsRun, len(result.failures), len(result.errors)
+
+
+def run_tests(serial=False):
+    """Run all unit tests using Python's built-in unittest.
+    
+    Each test file runs in its own worker process: the per-module temporary
+    directory in tests/helpers.py and the patch() mocks are process-wide
+    state, so test files cannot share a process concurrently. ``serial``
+    runs everything in this process instead.
+    """
     print("🚀 Purchase Price Analysis - Unit Test Runner")
     print("="*60)
     
-    # Add project root to Python path
-    project_root = Path(__file__).parent
-    sys.path.insert(0, str(project_root))
-    
     # Discover and run tests
     loader = unittest.TestLoader()
     
     try:
-        # Try to load tests from the tests directory
-        suite = loader.discover('tests', pattern='test_*.py')
+        test_files = sorted(p.name for p in (PROJECT_ROOT / 'tests').glob('test_*.py'))
         
-        # Run the tests
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
+        if serial or len(test_files) < 2:
+            # Try to load tests from the tests directory
+            suite = loader.discover('tests', pattern='test_*.py')
+            
+            # Run the tests
+            runner = unittest.TextTestRunner(verbosity=2)
+            result = runner.run(suite)
+            tests_run, failures, errors = result.testsRun, len(result.failures), len(result.errors)
+        else:
+            max_workers = min(len(test_files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                outcomes = list(executor.map(run_test_file, test_files))
+            
+            # Print each file's output in one piece, in file order
+            for output, *_ in outcomes:
+                sys.stderr.write(output)
+            tests_run = sum(outcome[1] for outcome in outcomes)
+            failures = sum(outcome[2] for outcome in outcomes)
+            errors = sum(outcome[3] for outcome in outcomes)
         
         # Print summary
         print("\n" + "="*60)
-        if result.wasSuccessful():
-            print(f"✅ All tests passed! ({result.testsRun} tests)")
+        if failures == 0 and errors == 0:
+            print(f"✅ All tests passed! ({tests_run} tests)")
             return 0
         else:
-            print(f"❌ Tests failed! ({len(result.failures)} failures, {len(result.errors)} errors)")
+            print(f"❌ Tests failed! ({failures} failures, {errors} errors)")
             return 1
             
     except ImportError as e:
@@ -54,11 +88,12 @@ def run_tests():
 def main():
     """Main function."""
     if len(sys.argv) > 1 and sys.argv[1] == "--help":
-        print("Usage: python3 run_unittest.py")
+        print("Usage: python3 run_unittest.py [--serial]")
         print("Runs all unit tests using Python's built-in unittest module.")
+        print("Test files run in parallel processes unless --serial is given.")
         return 0
     
-    return run_tests()
+    return run_tests(serial="--serial" in sys.argv[1:])
 
 
 if __name__ == "__main__":
@@ -5,55 +5,137 @@ Create sample Excel data for testing the price analyzer.
 
 import pandas as pd
 import numpy as np
+import xlsxwriter
 from pathlib import Path
 
-def create_sample_data():
-    """Create sample Excel data with two sheets."""
+# Reference dataset (reference=True); the tests pin these exact values
+_REFERENCE_TABELLE1 = {
+    'Artnr': [
+        'ART001', 'ART002', 'ART003', 'ART004', 'ART005',
+        'ART006', 'ART007', 'ART008', 'ART009', 'ART010'
+    ],
+    'Fielmann EK': [
+        15.50, 25.75, 35.00, 45.25, 55.50,
+        65.75, 75.00, 85.25, 95.50, 105.75
+    ],
+    'Other_Column': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
+}
+
+_REFERENCE_BESTAND = {
+    'Interne Referenz': [
+        'ART001', 'ART002', 'ART003', 'ART011', 'ART012',
+        'ART013', 'ART014', 'ART015', 'ART016', 'ART017',
+        'ART018', 'ART019', 'ART020'
+    ],
+    'Kosten': [
+        14.50, 24.75, 33.00, 50.25, 60.50,
+        70.75, 80.00, 90.25, 100.50, 110.75,
+        120.00, 130.25, 140.50
+    ],
+    'Other_Column': ['X', 'Y', 'Z', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
+}
+
+
+def _generate_sheets(n_rows, seed):
+    """Build synthetic Tabelle1/Bestand Odoo frames with the reference layout.
+    
+    Tabelle1 holds ``n_rows`` articles; Bestand Odoo repeats the first 30% of
+    them (slightly cheaper) followed by ``n_rows`` articles of its own.
+    """
+    rng = np.random.default_rng(seed)
+    n_common = max(1, int(n_rows * 0.3)) if n_rows else 0
+    n_total = 2 * n_rows
+    width = max(3, len(str(n_total)))
+    letters = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    
+    # Prices in 0.25 steps, like the reference data
+    tabelle1_ids = np.arange(1, n_rows + 1)
+    tabelle1_prices = np.round(rng.uniform(10, 500, n_rows) * 4) / 4
+    df_tabelle1 = pd.DataFrame({
+        'Artnr': np.char.add('ART', np.char.zfill(tabelle1_ids.astype(str), width)),
+        'Fielmann EK': tabelle1_prices,
+        'Other_Column': letters[np.arange(n_rows) % len(letters)]
+    })
+    
+    bestand_ids = np.concatenate([tabelle1_ids[:n_common], np.arange(n_rows + 1, n_total + 1)])
+    bestand_prices = np.concatenate([
+        tabelle1_prices[:n_common] - np.round(rng.uniform(0, 3, n_common) * 4) / 4,
+        np.round(rng.uniform(10, 500, n_rows) * 4) / 4
+    ])
+    df_bestand = pd.DataFrame({
+        'Interne Referenz': np.char.add('ART', np.char.zfill(bestand_ids.astype(str), width)),
+        'Kosten': bestand_prices,
+        'Other_Column': letters[(np.arange(len(bestand_ids)) + 23) % len(letters)]
+    })
+    return df_tabelle1, df_bestand
+
+
+def _write_xlsx(path, sheets):
+    """Write DataFrames to an .xlsx workbook with xlsxwriter's constant_memory mode.
+    
+    constant_memory flushes each row to disk as soon as the next one starts, so
+    peak memory stays at a single row regardless of the row count. The catch is
+    that cells must be written strictly row by row (anything written to an
+    earlier row is silently dropped); pandas' to_excel writes column by column,
+    so rows are streamed here with write_row instead.
+    """
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_numbers': False})
+    try:
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, list(df.columns))
+            # tolist() yields Python scalars, which xlsxwriter writes natively
+            columns = [df[col].tolist() for col in df.columns]
+            for row_idx, row in enumerate(zip(*columns), start=1):
+                worksheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
+
+
+def create_sample_data(output_format='xlsx', n_rows=10, seed=0, data_dir='data', reference=False):
+    """Create sample data with two sheets in ``data_dir``.
+
+    ``output_format='xlsx'`` writes the two-sheet workbook purchase_price.xlsx.
+    ``output_format='parquet'`` skips the Excel container and writes one Parquet
+    file per sheet instead: purchase_price.parquet (Tabelle1) and
+    purchase_price_bestand.parquet (Bestand Odoo).
+    
+    Tabelle1 gets ``n_rows`` articles generated from a seeded RNG.
+    ``reference=True`` writes the fixed, hand-listed reference dataset
+    instead (10 + 13 articles); ``n_rows`` and ``seed`` are then ignored.
+    """
     
     # Create data directory if it doesn't exist
-    Path("data").mkdir(exist_ok=True)
-    
-    # Sample data for Tabelle1 (latest prices)
-    tabelle1_data = {
-        'Artnr': [
-            'ART001', 'ART002', 'ART003', 'ART004', 'ART005',
-            'ART006', 'ART007', 'ART008', 'ART009', 'ART010'
-        ],
-        'Fielmann EK': [
-            15.50, 25.75, 35.00, 45.25, 55.50,
-            65.75, 75.00, 85.25, 95.50, 105.75
-        ],
-        'Other_Column': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
-    }
-    
-    # Sample data for Bestand Odoo (complete database)
-    bestand_data = {
-        'Interne Referenz': [
-            'ART001', 'ART002', 'ART003', 'ART011', 'ART012',
-            'ART013', 'ART014', 'ART015', 'ART016', 'ART017',
-            'ART018', 'ART019', 'ART020'
-        ],
-        'Kosten': [
-            14.50, 24.75, 33.00, 50.25, 60.50,
-            70.75, 80.00, 90.25, 100.50, 110.75,
-            120.00, 130.25, 140.50
-        ],
-        'Other_Column': ['X', 'Y', 'Z', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
-    }
-    
-    # Create DataFrames
-    df_tabelle1 = pd.DataFrame(tabelle1_data)
-    df_bestand = pd.DataFrame(bestand_data)
-    
-    # Create Excel file with multiple sheets
-    with pd.ExcelWriter('data/purchase_price.xlsx', engine='openpyxl') as writer:
-        df_tabelle1.to_excel(writer, sheet_name='Tabelle1', index=False)
-        df_bestand.to_excel(writer, sheet_name='Bestand Odoo', index=False)
-    
-    print("Sample Excel file created: data/purchase_price.xlsx")
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    
+    if reference:
+        df_tabelle1 = pd.DataFrame(_REFERENCE_TABELLE1)
+        df_bestand = pd.DataFrame(_REFERENCE_BESTAND)
+    else:
+        df_tabelle1, df_bestand = _generate_sheets(n_rows, seed)
+    
+    if output_format == 'parquet':
+        tabelle1_path = data_dir / 'purchase_price.parquet'
+        bestand_path = data_dir / 'purchase_price_bestand.parquet'
+        df_tabelle1.to_parquet(tabelle1_path, engine='pyarrow', compression='snappy', index=False)
+        df_bestand.to_parquet(bestand_path, engine='pyarrow', compression='snappy', index=False)
+        print(f"Sample Parquet files created: {tabelle1_path}, {bestand_path}")
+    elif output_format == 'xlsx':
+        # Create Excel file with multiple sheets
+        excel_path = data_dir / 'purchase_price.xlsx'
+        _write_xlsx(str(excel_path), {
+            'Tabelle1': df_tabelle1,
+            'Bestand Odoo': df_bestand
+        })
+        
+        print(f"Sample Excel file created: {excel_path}")
+    else:
+        raise ValueError(f"Unsupported format: {output_format}")
+    
     print(f"Tabelle1: {len(df_tabelle1)} articles")
     print(f"Bestand Odoo: {len(df_bestand)} articles")
     print(f"Common articles: {len(set(df_tabelle1['Artnr']).intersection(set(df_bestand['Interne Referenz'])))}")
 
 if __name__ == "__main__":
-    create_sample_data()
+    create_sample_data(reference=True)
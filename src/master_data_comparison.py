@@ -6,25 +6,100 @@ Compares consolidated purchase prices with master product data.
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 import logging
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 import re
+from pandas.api.types import union_categoricals
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('master_data_comparison.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging; main() adds the log file for the duration of a run,
+# so importing the module creates no file
+_LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=_LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+# Article numbers are compared as strings on both sides; use Arrow-backed
+# strings when pyarrow is available (contiguous buffers, faster hashing).
+# Arrow's native CSV writer formats values in C++ instead of pandas'
+# per-value Python formatting; used by _write_csv when pyarrow is available
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    _ARTICLE_DTYPE = 'string[pyarrow]'
+except ImportError:
+    pa = pa_csv = None
+    _ARTICLE_DTYPE = 'string'
+
+# Rust-based calamine reader is much faster than openpyxl; fall back when
+# python-calamine is not installed
+try:
+    import python_calamine  # noqa: F401
+    _EXCEL_ENGINE = 'calamine'
+except ImportError:
+    _EXCEL_ENGINE = 'openpyxl'
+
+# Patterns used by clean_master_data, compiled once per process
+# Article number: the digits after the last underscore of the SKU
+_RE_ARTICLE = re.compile(r'_(\d+)$')
+# Currency symbols, thousands separators and whitespace in price cells
+_RE_CURRENCY = re.compile(r'[€$£¥,\s]')
+
+def _top_k(df: pd.DataFrame, column: str, k: int, largest: bool = True) -> pd.DataFrame:
+    """Return the k rows with the largest (or smallest) values in column.
+    
+    Drop-in for DataFrame.nlargest/nsmallest (keep='first'): np.argpartition
+    finds the k-th value in O(N), and only the rows on the near side of it
+    are sorted. Ties keep their original row order and NaNs come last.
+    """
+    values = df[column].to_numpy(dtype='float64')
+    is_nan = np.isnan(values)
+    valid = np.flatnonzero(~is_nan)
+    if k <= 0:
+        return df.iloc[[]]
+    if k < len(valid):
+        v = values[valid]
+        if largest:
+            kth = v[np.argpartition(v, -k)[-k]]
+            valid = valid[v >= kth]
+        else:
+            kth = v[np.argpartition(v, k - 1)[k - 1]]
+            valid = valid[v <= kth]
+    keys = -values[valid] if largest else values[valid]
+    order = valid[np.argsort(keys, kind='stable')[:k]]
+    if len(order) < k:
+        order = np.concatenate([order, np.flatnonzero(is_nan)[:k - len(order)]])
+    return df.iloc[order]
+
+
+def _write_csv(df: pd.DataFrame, path: str) -> None:
+    """Write df to CSV without the index, using pyarrow when installed.
+    
+    The Arrow writer quotes string values and writes booleans as
+    true/false; pandas.read_csv parses both back to the same values.
+    """
+    if pa_csv is None:
+        df.to_csv(path, index=False)
+        return
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def _format_price_changes(df: pd.DataFrame, increase: bool) -> str:
+    """Format one report line per article, built column-wise and joined once."""
+    sign = '+' if increase else ''
+    lines = (
+        '   • ' + df['article_number'].astype(str)
+        + ': €' + df['master_price'].map('{:.2f}'.format)
+        + ' → €' + df['consolidated_price'].map('{:.2f}'.format)
+        + (' (+€' if increase else ' (') + df['price_difference'].map('{:.2f}'.format)
+        + ', ' + sign + df['price_difference_pct'].map('{:.1f}'.format) + '%)'
+    )
+    return '\n'.join(lines)
+
+
 class MasterDataComparison:
     """Compares consolidated purchase prices with master product data."""
     
@@ -41,22 +116,29 @@ class MasterDataComparison:
         try:
             logger.info("Loading consolidated purchase price data...")
             self.consolidated_data = pd.read_csv(self.consolidated_csv_path)
-            logger.info(f"Loaded consolidated data: {len(self.consolidated_data)} articles")
+            self.consolidated_data['article_number'] = (
+                self.consolidated_data['article_number'].astype(_ARTICLE_DTYPE)
+            )
+            logger.info("Loaded consolidated data: %d articles", len(self.consolidated_data))
             
             logger.info("Loading master product data...")
+            # Prices keep their native cell type so numeric columns can skip
+            # the string cleaning in clean_master_data
             self.master_data = pd.read_excel(
                 self.master_excel_path,
-                usecols=['Product ID [sku]', 'Store Purchase Price [attribute6]']
+                usecols=['Product ID [sku]', 'Store Purchase Price [attribute6]'],
+                engine=_EXCEL_ENGINE,
+                dtype={'Product ID [sku]': 'string'}
             )
-            logger.info(f"Loaded master data: {len(self.master_data)} articles")
+            logger.info("Loaded master data: %d articles", len(self.master_data))
             
             return self.consolidated_data, self.master_data
             
         except FileNotFoundError as e:
-            logger.error(f"File not found: {str(e)}")
+            logger.error("File not found: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Error loading data: {str(e)}")
+            logger.error("Error loading data: %s", e)
             raise
     
     def clean_master_data(self) -> None:
@@ -65,62 +147,81 @@ class MasterDataComparison:
         
         # Extract article numbers from Product ID [sku]
         # Format: <CategoryName>_<ArticleNumber>
+        # The captured digits are already clean, so no strip/replace pass is needed
         self.master_data['article_number'] = (
             self.master_data['Product ID [sku]']
             .astype(str)
-            .str.extract(r'_(\d+)$')[0]  # Extract digits after the last underscore
-        )
-        
-        # Clean and standardize article numbers
-        self.master_data['article_number'] = (
-            self.master_data['article_number']
-            .str.strip()
-            .str.replace(r'[^\w\-]', '', regex=True)
+            .str.extract(_RE_ARTICLE, expand=False)  # Extract digits after the last underscore
+            .astype(_ARTICLE_DTYPE)
         )
         
         # Clean prices
-        self.master_data['master_price'] = (
-            self.master_data['Store Purchase Price [attribute6]']
-            .astype(str)
-            .str.replace(r'[€$£¥,\s]', '', regex=True)
-            .str.replace(',', '.')
-            .replace('', np.nan)
-            .replace('nan', np.nan)
-            .astype(float)
-        )
+        raw_prices = self.master_data['Store Purchase Price [attribute6]']
+        if pd.api.types.is_numeric_dtype(raw_prices):
+            # Numeric cells need no currency stripping
+            self.master_data['master_price'] = raw_prices.astype(float)
+        else:
+            # Strip currency symbols/separators in one pass and convert once;
+            # anything unparseable ('', 'nan', ...) becomes NaN
+            self.master_data['master_price'] = pd.to_numeric(
+                raw_prices.astype(str).str.replace(_RE_CURRENCY, '', regex=True),
+                errors='coerce'
+            )
         
         # Remove rows with missing article numbers or prices
         initial_count = len(self.master_data)
         self.master_data = self.master_data.dropna(subset=['article_number', 'master_price'])
         self.master_data = self.master_data[self.master_data['article_number'] != '']
         
-        logger.info(f"Master data after cleaning: {len(self.master_data)} articles")
-        logger.info(f"Removed {initial_count - len(self.master_data)} rows with missing data")
+        logger.info("Master data after cleaning: %d articles", len(self.master_data))
+        logger.info("Removed %d rows with missing data", initial_count - len(self.master_data))
         
         # Show sample of extracted article numbers
         sample_extractions = self.master_data[['Product ID [sku]', 'article_number']].head(10)
-        logger.info("Sample article number extractions:")
-        for _, row in sample_extractions.iterrows():
-            logger.info(f"  {row['Product ID [sku]']} → {row['article_number']}")
+        logger.info("Sample article number extractions:\n%s", sample_extractions.to_string(index=False))
+        
+        self._downcast_columns()
+    
+    def _downcast_columns(self) -> None:
+        """Shrink the comparison columns once both datasets are cleaned.
+        
+        Article numbers become a categorical shared by both frames, so merges
+        and set operations compare integer codes. Prices stay float64: in
+        float32, a one-cent difference between prices above about €4,096 no
+        longer rounds back to 0.01 and would be flagged as a discrepancy.
+        """
+        articles = union_categoricals(
+            [pd.Categorical(self.consolidated_data['article_number']),
+             pd.Categorical(self.master_data['article_number'])],
+            sort_categories=True
+        )
+        article_dtype = pd.CategoricalDtype(articles.categories)
+        self.consolidated_data['article_number'] = (
+            self.consolidated_data['article_number'].astype(article_dtype)
+        )
+        self.master_data['article_number'] = (
+            self.master_data['article_number'].astype(article_dtype)
+        )
     
     def compare_articles(self) -> Dict[str, Any]:
         """Compare articles between consolidated and master data."""
         logger.info("Comparing articles between datasets...")
         
-        # Get article sets - ensure both are strings for proper comparison
-        consolidated_articles = set(self.consolidated_data['article_number'].astype(str).unique())
-        master_articles = set(self.master_data['article_number'].astype(str).unique())
+        # Get unique articles as indexes (both sides are normalized to strings
+        # when loaded/cleaned) so the set operations run on pandas hash tables
+        consolidated_articles = pd.Index(self.consolidated_data['article_number'].unique())
+        master_articles = pd.Index(self.master_data['article_number'].unique())
         
         # Find overlaps and differences
         common_articles = consolidated_articles.intersection(master_articles)
-        missing_in_master = consolidated_articles - master_articles
-        extra_in_master = master_articles - consolidated_articles
+        missing_in_master = consolidated_articles.difference(master_articles)
+        extra_in_master = master_articles.difference(consolidated_articles)
         
-        logger.info(f"Articles in consolidated data: {len(consolidated_articles):,}")
-        logger.info(f"Articles in master data: {len(master_articles):,}")
-        logger.info(f"Common articles: {len(common_articles):,}")
-        logger.info(f"Missing in master data: {len(missing_in_master):,}")
-        logger.info(f"Extra in master data: {len(extra_in_master):,}")
+        logger.info("Articles in consolidated data: %d", len(consolidated_articles))
+        logger.info("Articles in master data: %d", len(master_articles))
+        logger.info("Common articles: %d", len(common_articles))
+        logger.info("Missing in master data: %d", len(missing_in_master))
+        logger.info("Extra in master data: %d", len(extra_in_master))
         
         return {
             'consolidated_articles': consolidated_articles,
@@ -130,51 +231,55 @@ class MasterDataComparison:
             'extra_in_master': extra_in_master
         }
     
-    def analyze_price_discrepancies(self, common_articles: set) -> pd.DataFrame:
+    def analyze_price_discrepancies(self, common_articles: pd.Index) -> pd.DataFrame:
         """Analyze price discrepancies for common articles."""
         logger.info("Analyzing price discrepancies...")
         
-        if not common_articles:
+        if len(common_articles) == 0:
             logger.warning("No common articles found for price comparison")
             return pd.DataFrame()
         
-        # Create comparison dataframe
-        price_comparisons = []
-        
-        for article in common_articles:
-            # Get consolidated price (should be unique after our cleaning)
-            consolidated_price = self.consolidated_data[
-                self.consolidated_data['article_number'].astype(str) == article
-            ]['price'].iloc[0]
-            
-            # Get master price (take first if multiple entries)
-            master_price = self.master_data[
-                self.master_data['article_number'].astype(str) == article
-            ]['master_price'].iloc[0]
-            
-            price_diff = consolidated_price - master_price
-            price_diff_pct = (price_diff / master_price * 100) if master_price != 0 else 0
-            
-            price_comparisons.append({
-                'article_number': article,
-                'consolidated_price': consolidated_price,
-                'master_price': master_price,
-                'price_difference': price_diff,
-                'price_difference_pct': price_diff_pct,
-                'has_discrepancy': abs(price_diff) > 0.01  # Consider differences > 1 cent as discrepancies
-            })
-        
-        comparison_df = pd.DataFrame(price_comparisons)
+        # Join both price columns on the article number in a single pass
+        # (master data may contain several entries per article - keep the first)
+        consolidated = (
+            self.consolidated_data[['article_number', 'price']]
+            .drop_duplicates('article_number')
+        )
+        master = (
+            self.master_data[['article_number', 'master_price']]
+            .drop_duplicates('article_number')
+        )
         
-        # Calculate statistics
-        discrepancies = comparison_df[comparison_df['has_discrepancy']]
+        comparison_df = (
+            consolidated
+            .merge(master, on='article_number', how='inner')
+            .rename(columns={'price': 'consolidated_price'})
+        )
+        # Round away the binary representation error (e.g. 20.00 - 19.99), so
+        # exact one-cent differences stay below the discrepancy threshold
+        comparison_df['price_difference'] = (
+            comparison_df['consolidated_price'] - comparison_df['master_price']
+        ).round(4)
+        comparison_df['price_difference_pct'] = np.where(
+            comparison_df['master_price'] != 0,
+            comparison_df['price_difference'] / comparison_df['master_price'] * 100,
+            0
+        )
+        # Consider differences > 1 cent as discrepancies
+        comparison_df['has_discrepancy'] = comparison_df['price_difference'].abs() > 0.01
         
-        logger.info(f"Price comparison completed for {len(comparison_df)} articles")
-        logger.info(f"Articles with price discrepancies: {len(discrepancies)} ({len(discrepancies)/len(comparison_df)*100:.1f}%)")
-        logger.info(f"Average price difference: €{comparison_df['price_difference'].mean():.2f}")
-        logger.info(f"Median price difference: €{comparison_df['price_difference'].median():.2f}")
-        logger.info(f"Max price difference: €{comparison_df['price_difference'].max():.2f}")
-        logger.info(f"Min price difference: €{comparison_df['price_difference'].min():.2f}")
+        # Calculate statistics (only when they will actually be logged)
+        if logger.isEnabledFor(logging.INFO):
+            n_discrepancies = int(comparison_df['has_discrepancy'].sum())
+            price_difference = comparison_df['price_difference']
+            
+            logger.info("Price comparison completed for %d articles", len(comparison_df))
+            logger.info("Articles with price discrepancies: %d (%.1f%%)",
+                        n_discrepancies, n_discrepancies / len(comparison_df) * 100)
+            logger.info("Average price difference: €%.2f", price_difference.mean())
+            logger.info("Median price difference: €%.2f", price_difference.median())
+            logger.info("Max price difference: €%.2f", price_difference.max())
+            logger.info("Min price difference: €%.2f", price_difference.min())
         
         return comparison_df
     
@@ -185,154 +290,107 @@ class MasterDataComparison:
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        # Set style
-        plt.style.use('default')
-        sns.set_palette("husl")
-        
         # Check if we have data to visualize
         if comparison_df.empty:
             logger.warning("No price comparison data available for visualization")
             # Create a simple summary plot
-            plt.figure(figsize=(8, 6))
-            plt.text(0.5, 0.5, 'No Common Articles Found\nfor Price Comparison', 
-                    ha='center', va='center', fontsize=16, 
-                    bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray"))
-            plt.xlim(0, 1)
-            plt.ylim(0, 1)
-            plt.axis('off')
-            plt.title('Price Comparison Analysis', fontsize=18, fontweight='bold')
-            plt.savefig(f'{output_dir}/no_comparison_data.png', dpi=300, bbox_inches='tight')
-            plt.close()
+            _plot_no_comparison_data(f'{output_dir}/no_comparison_data.png')
             return
         
-        # 1. Price Difference Distribution
-        plt.figure(figsize=(12, 8))
-        plt.subplot(2, 2, 1)
-        comparison_df['price_difference'].hist(bins=50, alpha=0.7, color='skyblue', edgecolor='black')
-        plt.title('Distribution of Price Differences\n(Ecomm_PurchasePrice - Pricefx_PurchasePrice)', fontsize=12, fontweight='bold')
-        plt.xlabel('Price Difference (€)')
-        plt.ylabel('Frequency')
-        plt.axvline(0, color='red', linestyle='--', alpha=0.7, label='No Difference')
-        plt.legend()
-        
-        # 2. Price Difference Percentage Distribution
-        plt.subplot(2, 2, 2)
-        comparison_df['price_difference_pct'].hist(bins=50, alpha=0.7, color='lightcoral', edgecolor='black')
-        plt.title('Distribution of Price Differences (%)', fontsize=12, fontweight='bold')
-        plt.xlabel('Price Difference (%)')
-        plt.ylabel('Frequency')
-        plt.axvline(0, color='red', linestyle='--', alpha=0.7, label='No Difference')
-        plt.legend()
-        
-        # 3. Scatter Plot: Ecomm_PurchasePrice vs Pricefx_PurchasePrice Prices
-        plt.subplot(2, 2, 3)
-        plt.scatter(comparison_df['master_price'], comparison_df['consolidated_price'], 
-                   alpha=0.6, s=20, color='green')
-        
-        # Add diagonal line for perfect match
-        max_price = max(comparison_df['master_price'].max(), comparison_df['consolidated_price'].max())
-        plt.plot([0, max_price], [0, max_price], 'r--', alpha=0.7, label='Perfect Match')
-        
-        plt.title('Ecomm_PurchasePrice vs Pricefx_PurchasePrice', fontsize=12, fontweight='bold')
-        plt.xlabel('Pricefx_PurchasePrice (€)')
-        plt.ylabel('Ecomm_PurchasePrice (€)')
-        plt.legend()
-        
-        # 4. Articles with Discrepancies
-        plt.subplot(2, 2, 4)
-        discrepancy_counts = comparison_df['has_discrepancy'].value_counts()
-        labels = ['No Discrepancy', 'Has Discrepancy']
-        colors = ['lightgreen', 'orange']
-        plt.pie(discrepancy_counts.values, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-        plt.title('Articles with Price Discrepancies', fontsize=12, fontweight='bold')
-        
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/price_comparison_overview.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 5. Top Discrepancies Bar Chart
-        if len(comparison_df[comparison_df['has_discrepancy']]) > 0:
-            plt.figure(figsize=(14, 8))
-            
-            # Top 20 largest positive discrepancies
-            plt.subplot(1, 2, 1)
-            top_positive = comparison_df.nlargest(20, 'price_difference')
-            plt.barh(range(len(top_positive)), top_positive['price_difference'], color='red', alpha=0.7)
-            plt.yticks(range(len(top_positive)), top_positive['article_number'])
-            plt.title('Top 20 Largest Price Increases\n(Ecomm_PurchasePrice > Pricefx_PurchasePrice)', fontsize=12, fontweight='bold')
-            plt.xlabel('Price Difference (€)')
-            
-            # Top 20 largest negative discrepancies
-            plt.subplot(1, 2, 2)
-            top_negative = comparison_df.nsmallest(20, 'price_difference')
-            plt.barh(range(len(top_negative)), top_negative['price_difference'], color='blue', alpha=0.7)
-            plt.yticks(range(len(top_negative)), top_negative['article_number'])
-            plt.title('Top 20 Largest Price Decreases\n(Ecomm_PurchasePrice < Pricefx_PurchasePrice)', fontsize=12, fontweight='bold')
-            plt.xlabel('Price Difference (€)')
-            
-            plt.tight_layout()
-            plt.savefig(f'{output_dir}/top_discrepancies.png', dpi=300, bbox_inches='tight')
-            plt.close()
-        
-        logger.info(f"Visualizations saved to {output_dir}/")
+        # Each figure only gets the columns it draws, to keep pickling cheap
+        jobs = [(
+            _plot_price_comparison_overview,
+            comparison_df[['consolidated_price', 'master_price', 'price_difference',
+                           'price_difference_pct', 'has_discrepancy']],
+            f'{output_dir}/price_comparison_overview.png'
+        )]
+        if comparison_df['has_discrepancy'].any():
+            jobs.append((
+                _plot_top_discrepancies,
+                comparison_df[['article_number', 'price_difference']],
+                f'{output_dir}/top_discrepancies.png'
+            ))
+        
+        # Figures are independent and CPU-bound (rasterization + PNG encoding),
+        # so render them in separate processes when more than one core is available
+        max_workers = min(len(jobs), 4, os.cpu_count() or 1)
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(func, data, path) for func, data, path in jobs]
+                for future in futures:
+                    future.result()
+        else:
+            for func, data, path in jobs:
+                func(data, path)
+        
+        logger.info("Visualizations saved to %s/", output_dir)
     
     def generate_report(self, comparison_results: Dict[str, Any], 
-                       price_comparison_df: pd.DataFrame) -> None:
-        """Generate comprehensive comparison report."""
+                       price_comparison_df: pd.DataFrame,
+                       details: Optional[bool] = None) -> None:
+        """Generate comprehensive comparison report.
+        
+        The per-article listings (missing articles, top price changes) are
+        included when ``details`` is true; by default they follow the
+        logger, i.e. they are skipped when INFO logging is disabled.
+        """
         logger.info("Generating comparison report...")
+        if details is None:
+            details = logger.isEnabledFor(logging.INFO)
         
-        print("\n" + "="*80)
-        print("MASTER DATA COMPARISON REPORT")
-        print("="*80)
+        # Collect the report and write it to stdout in one go
+        lines = []
+        lines.append("\n" + "="*80)
+        lines.append("MASTER DATA COMPARISON REPORT")
+        lines.append("="*80)
         
         # Data Overview
-        print(f"\n📊 DATA OVERVIEW:")
-        print(f"   • Consolidated articles: {len(comparison_results['consolidated_articles']):,}")
-        print(f"   • Master data articles: {len(comparison_results['master_articles']):,}")
-        print(f"   • Common articles: {len(comparison_results['common_articles']):,}")
-        print(f"   • Coverage: {len(comparison_results['common_articles'])/len(comparison_results['consolidated_articles'])*100:.1f}%")
+        lines.append(f"\n📊 DATA OVERVIEW:")
+        lines.append(f"   • Consolidated articles: {len(comparison_results['consolidated_articles']):,}")
+        lines.append(f"   • Master data articles: {len(comparison_results['master_articles']):,}")
+        lines.append(f"   • Common articles: {len(comparison_results['common_articles']):,}")
+        lines.append(f"   • Coverage: {len(comparison_results['common_articles'])/len(comparison_results['consolidated_articles'])*100:.1f}%")
         
         # Missing Articles
         missing_count = len(comparison_results['missing_in_master'])
-        print(f"\n❌ MISSING ARTICLES IN MASTER DATA:")
-        print(f"   • Count: {missing_count:,}")
-        print(f"   • Percentage: {missing_count/len(comparison_results['consolidated_articles'])*100:.1f}%")
+        lines.append(f"\n❌ MISSING ARTICLES IN MASTER DATA:")
+        lines.append(f"   • Count: {missing_count:,}")
+        lines.append(f"   • Percentage: {missing_count/len(comparison_results['consolidated_articles'])*100:.1f}%")
         
-        if missing_count > 0 and missing_count <= 20:
-            print("   • Missing article numbers:")
+        if details and 0 < missing_count <= 20:
+            lines.append("   • Missing article numbers:")
             for article in sorted(list(comparison_results['missing_in_master'])[:20]):
-                print(f"     - {article}")
-        elif missing_count > 20:
-            print("   • First 20 missing article numbers:")
+                lines.append(f"     - {article}")
+        elif details and missing_count > 20:
+            lines.append("   • First 20 missing article numbers:")
             for article in sorted(list(comparison_results['missing_in_master'])[:20]):
-                print(f"     - {article}")
-            print(f"     ... and {missing_count - 20} more")
+                lines.append(f"     - {article}")
+            lines.append(f"     ... and {missing_count - 20} more")
         
         # Price Analysis
         if not price_comparison_df.empty:
             discrepancies = price_comparison_df[price_comparison_df['has_discrepancy']]
             
-            print(f"\n💰 PRICE ANALYSIS:")
-            print(f"   • Articles compared: {len(price_comparison_df):,}")
-            print(f"   • Articles with discrepancies: {len(discrepancies):,} ({len(discrepancies)/len(price_comparison_df)*100:.1f}%)")
-            print(f"   • Average price difference: €{price_comparison_df['price_difference'].mean():.2f}")
-            print(f"   • Median price difference: €{price_comparison_df['price_difference'].median():.2f}")
-            print(f"   • Standard deviation: €{price_comparison_df['price_difference'].std():.2f}")
-            print(f"   • Max price increase: €{price_comparison_df['price_difference'].max():.2f}")
-            print(f"   • Max price decrease: €{price_comparison_df['price_difference'].min():.2f}")
+            lines.append(f"\n💰 PRICE ANALYSIS:")
+            lines.append(f"   • Articles compared: {len(price_comparison_df):,}")
+            lines.append(f"   • Articles with discrepancies: {len(discrepancies):,} ({len(discrepancies)/len(price_comparison_df)*100:.1f}%)")
+            lines.append(f"   • Average price difference: €{price_comparison_df['price_difference'].mean():.2f}")
+            lines.append(f"   • Median price difference: €{price_comparison_df['price_difference'].median():.2f}")
+            lines.append(f"   • Standard deviation: €{price_comparison_df['price_difference'].std():.2f}")
+            lines.append(f"   • Max price increase: €{price_comparison_df['price_difference'].max():.2f}")
+            lines.append(f"   • Max price decrease: €{price_comparison_df['price_difference'].min():.2f}")
             
-            if len(discrepancies) > 0:
-                print(f"\n📈 TOP 10 PRICE INCREASES:")
-                top_increases = discrepancies.nlargest(10, 'price_difference')
-                for _, row in top_increases.iterrows():
-                    print(f"   • {row['article_number']}: €{row['master_price']:.2f} → €{row['consolidated_price']:.2f} (+€{row['price_difference']:.2f}, +{row['price_difference_pct']:.1f}%)")
+            if details and len(discrepancies) > 0:
+                lines.append(f"\n📈 TOP 10 PRICE INCREASES:")
+                top_increases = _top_k(discrepancies, 'price_difference', 10)
+                lines.append(_format_price_changes(top_increases, increase=True))
                 
-                print(f"\n📉 TOP 10 PRICE DECREASES:")
-                top_decreases = discrepancies.nsmallest(10, 'price_difference')
-                for _, row in top_decreases.iterrows():
-                    print(f"   • {row['article_number']}: €{row['master_price']:.2f} → €{row['consolidated_price']:.2f} ({row['price_difference']:.2f}, {row['price_difference_pct']:.1f}%)")
+                lines.append(f"\n📉 TOP 10 PRICE DECREASES:")
+                top_decreases = _top_k(discrepancies, 'price_difference', 10, largest=False)
+                lines.append(_format_price_changes(top_decreases, increase=False))
         
-        print("\n" + "="*80)
+        lines.append("\n" + "="*80)
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def save_detailed_results(self, comparison_results: Dict[str, Any], 
                             price_comparison_df: pd.DataFrame, 
@@ -341,30 +399,152 @@ class MasterDataComparison:
         logger.info("Saving detailed results...")
         
         # Save missing articles
-        if comparison_results['missing_in_master']:
+        if len(comparison_results['missing_in_master']) > 0:
             missing_df = pd.DataFrame({
                 'missing_article_numbers': sorted(list(comparison_results['missing_in_master']))
             })
-            missing_df.to_csv(f"{output_dir}/missing_articles_in_master.csv", index=False)
-            logger.info(f"Missing articles saved to {output_dir}/missing_articles_in_master.csv")
+            _write_csv(missing_df, f"{output_dir}/missing_articles_in_master.csv")
+            logger.info("Missing articles saved to %s/missing_articles_in_master.csv", output_dir)
         
         # Save price comparison results
         if not price_comparison_df.empty:
-            price_comparison_df.to_csv(f"{output_dir}/price_comparison_results.csv", index=False)
-            logger.info(f"Price comparison results saved to {output_dir}/price_comparison_results.csv")
+            _write_csv(price_comparison_df, f"{output_dir}/price_comparison_results.csv")
+            logger.info("Price comparison results saved to %s/price_comparison_results.csv", output_dir)
             
             # Save only discrepancies
             discrepancies = price_comparison_df[price_comparison_df['has_discrepancy']]
             if len(discrepancies) > 0:
-                discrepancies.to_csv(f"{output_dir}/price_discrepancies_only.csv", index=False)
-                logger.info(f"Price discrepancies saved to {output_dir}/price_discrepancies_only.csv")
+                _write_csv(discrepancies, f"{output_dir}/price_discrepancies_only.csv")
+                logger.info("Price discrepancies saved to %s/price_discrepancies_only.csv", output_dir)
+
+
+def _pyplot():
+    """Import pyplot on first use and apply the shared plot style.
+    
+    Keeps matplotlib out of the import path of non-plotting runs; called by
+    each plotting function since they may run in a worker process.
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend; figures are only saved to disk
+    import matplotlib.pyplot as plt
+    plt.style.use('default')
+    return plt
+
+
+def _hist_bar(ax, values: pd.Series, **kwargs) -> None:
+    """Draw a 50-bin histogram from counts precomputed with np.histogram."""
+    values = values.to_numpy(dtype='float64')
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=50)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **kwargs)
+    ax.grid(True)
+
+
+def _plot_no_comparison_data(output_path: str) -> None:
+    """Save a placeholder figure when there is nothing to compare."""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 6), constrained_layout=True)
+    ax.text(0.5, 0.5, 'No Common Articles Found\nfor Price Comparison', 
+            ha='center', va='center', fontsize=16, 
+            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray"))
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
+    ax.set_title('Price Comparison Analysis', fontsize=18, fontweight='bold')
+    fig.savefig(output_path, dpi=150)
+    plt.close(fig)
+
 
-def main():
+def _plot_price_comparison_overview(comparison_df: pd.DataFrame, output_path: str) -> None:
+    """Save the 2x2 overview of price difference distributions and discrepancies."""
+    plt = _pyplot()
+    # constrained_layout solves the layout in one pass during the draw, so
+    # neither tight_layout() nor bbox_inches='tight' (a second render) is needed
+    fig, axes = plt.subplots(2, 2, figsize=(12, 8), constrained_layout=True)
+    
+    # 1. Price Difference Distribution
+    ax = axes[0, 0]
+    _hist_bar(ax, comparison_df['price_difference'], alpha=0.7, color='skyblue', edgecolor='black')
+    ax.set_title('Distribution of Price Differences\n(Ecomm_PurchasePrice - Pricefx_PurchasePrice)', fontsize=12, fontweight='bold')
+    ax.set_xlabel('Price Difference (€)')
+    ax.set_ylabel('Frequency')
+    ax.axvline(0, color='red', linestyle='--', alpha=0.7, label='No Difference')
+    ax.legend()
+    
+    # 2. Price Difference Percentage Distribution
+    ax = axes[0, 1]
+    _hist_bar(ax, comparison_df['price_difference_pct'], alpha=0.7, color='lightcoral', edgecolor='black')
+    ax.set_title('Distribution of Price Differences (%)', fontsize=12, fontweight='bold')
+    ax.set_xlabel('Price Difference (%)')
+    ax.set_ylabel('Frequency')
+    ax.axvline(0, color='red', linestyle='--', alpha=0.7, label='No Difference')
+    ax.legend()
+    
+    # 3. Scatter Plot: Ecomm_PurchasePrice vs Pricefx_PurchasePrice Prices
+    ax = axes[1, 0]
+    ax.scatter(comparison_df['master_price'], comparison_df['consolidated_price'], 
+               alpha=0.6, s=20, color='green')
+    
+    # Add diagonal line for perfect match
+    max_price = max(comparison_df['master_price'].max(), comparison_df['consolidated_price'].max())
+    ax.plot([0, max_price], [0, max_price], 'r--', alpha=0.7, label='Perfect Match')
+    
+    ax.set_title('Ecomm_PurchasePrice vs Pricefx_PurchasePrice', fontsize=12, fontweight='bold')
+    ax.set_xlabel('Pricefx_PurchasePrice (€)')
+    ax.set_ylabel('Ecomm_PurchasePrice (€)')
+    ax.legend()
+    
+    # 4. Articles with Discrepancies
+    ax = axes[1, 1]
+    discrepancy_counts = comparison_df['has_discrepancy'].value_counts()
+    labels = ['No Discrepancy', 'Has Discrepancy']
+    colors = ['lightgreen', 'orange']
+    ax.pie(discrepancy_counts.values, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    ax.set_title('Articles with Price Discrepancies', fontsize=12, fontweight='bold')
+    
+    # Screen-resolution overview; only the top discrepancies chart is kept at print DPI
+    fig.savefig(output_path, dpi=150)
+    plt.close(fig)
+
+
+def _plot_top_discrepancies(comparison_df: pd.DataFrame, output_path: str) -> None:
+    """Save bar charts of the 20 largest price increases and decreases."""
+    plt = _pyplot()
+    fig, (ax_pos, ax_neg) = plt.subplots(1, 2, figsize=(14, 8), constrained_layout=True)
+    
+    # Top 20 largest positive discrepancies
+    top_positive = _top_k(comparison_df, 'price_difference', 20)
+    ax_pos.barh(range(len(top_positive)), top_positive['price_difference'], color='red', alpha=0.7)
+    ax_pos.set_yticks(range(len(top_positive)), top_positive['article_number'])
+    ax_pos.set_title('Top 20 Largest Price Increases\n(Ecomm_PurchasePrice > Pricefx_PurchasePrice)', fontsize=12, fontweight='bold')
+    ax_pos.set_xlabel('Price Difference (€)')
+    
+    # Top 20 largest negative discrepancies
+    top_negative = _top_k(comparison_df, 'price_difference', 20, largest=False)
+    ax_neg.barh(range(len(top_negative)), top_negative['price_difference'], color='blue', alpha=0.7)
+    ax_neg.set_yticks(range(len(top_negative)), top_negative['article_number'])
+    ax_neg.set_title('Top 20 Largest Price Decreases\n(Ecomm_PurchasePrice < Pricefx_PurchasePrice)', fontsize=12, fontweight='bold')
+    ax_neg.set_xlabel('Price Difference (€)')
+    
+    fig.savefig(output_path, dpi=300)
+    plt.close(fig)
+
+
+def main(argv: Optional[List[str]] = None, log_path: str = "master_data_comparison.log"):
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Compare consolidated purchase prices with master data")
+    parser.add_argument("--report", action="store_true",
+                        help="Always include the per-article listings in the report, "
+                             "even when INFO logging is disabled")
+    args = parser.parse_args(argv)
+    
     # File paths
     consolidated_csv = "data/final_purchase_price.csv"
     master_excel = "data/PurchasePriceCost-2025-09-09T15-41-13.xlsx"
     
+    file_handler = logging.FileHandler(log_path)
+    file_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+    logger.addHandler(file_handler)
+    
     try:
         # Initialize comparison analyzer
         analyzer = MasterDataComparison(consolidated_csv, master_excel)
@@ -387,7 +567,8 @@ def main():
         analyzer.generate_visualizations(price_comparison_df)
         
         # Generate report
-        analyzer.generate_report(comparison_results, price_comparison_df)
+        analyzer.generate_report(comparison_results, price_comparison_df,
+                                 details=True if args.report else None)
         
         # Save detailed results
         analyzer.save_detailed_results(comparison_results, price_comparison_df)
@@ -395,8 +576,11 @@ def main():
         logger.info("Master data comparison completed successfully!")
         
     except Exception as e:
-        logger.error(f"Comparison analysis failed: {str(e)}")
+        logger.error("Comparison analysis failed: %s", e)
         raise
+    finally:
+        logger.removeHandler(file_handler)
+        file_handler.close()
 
 if __name__ == "__main__":
     main()
@@ -7,223 +7,507 @@ Analyzes and merges purchase price data from Excel sheets.
 import pandas as pd
 import numpy as np
 import logging
-import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Dict, Any
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('price_analysis.log'),
-        logging.StreamHandler()
-    ]
-)
+from typing import Tuple, Dict, Any, Optional
+from pandas.api.types import union_categoricals
+
+# Configure logging; main() additionally writes each run to a log file
+_LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=_LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+# Rust-based calamine reader is much faster than openpyxl; fall back when
+# python-calamine is not installed
+try:
+    import python_calamine  # noqa: F401
+    _EXCEL_ENGINE = 'calamine'
+except ImportError:
+    _EXCEL_ENGINE = 'openpyxl'
+
+# Arrow compute kernels run the string cleaning in C++ over contiguous UTF-8
+# buffers; the pandas .str path is used when pyarrow is not installed
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pc = pa_csv = None
+
+# Converting to and from Arrow has a fixed cost of a few milliseconds, so
+# smaller columns are cleaned with the pandas .str path
+_ARROW_MIN_ROWS = 1_000
+
+# Optional JIT kernel for ASCII article numbers; without numba the Arrow/pandas
+# regex path is used
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Below this many rows the one-off JIT compilation costs more than it saves
+_NUMBA_MIN_ROWS = 50_000
+
+# Article numbers keep only word characters and hyphens
+_ART_RE = re.compile(r'[^\w\-]')
+# Price cleaning in a single pass: currency symbols, whitespace and thousands
+# separators are dropped, while a comma followed only by one or two trailing
+# digits is a decimal comma and becomes '.' ('25,75' -> 25.75,
+# '1,234.50' -> 1234.50)
+_PRICE_RE = re.compile(r'(?P<decimal>,(?=\d{1,2}[€$£¥\s]*$))|[€$£¥,\s]')
+
+
+def _price_repl(match: re.Match) -> str:
+    """Replacement for _PRICE_RE matches."""
+    return '.' if match.group('decimal') else ''
+
+
+# RE2 (used by Arrow) has no replacement callbacks, so the decimal comma is
+# rewritten first and the remaining characters are stripped in a second pass.
+# \p{L}/\p{N} keep the Unicode meaning of Python's \w; RE2's \s and \d are
+# ASCII-only, so the Unicode whitespace (NBSP, thin space, ...) and digits
+# that Python's \s and \d match are spelled out
+_ARROW_SPACE = r'\s\x{0B}\x{1C}-\x{1F}\x{85}\p{Zs}\x{2028}\x{2029}'
+_ARROW_ART_PATTERN = r'[^\p{L}\p{N}_\-]'
+_ARROW_DECIMAL_PATTERN = r',(\p{Nd}{1,2}[€$£¥' + _ARROW_SPACE + r']*)$'
+_ARROW_STRIP_PATTERN = r'[€$£¥,' + _ARROW_SPACE + r']'
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _is_kept_byte(b):
+        return ((48 <= b <= 57) or (65 <= b <= 90) or (97 <= b <= 122)
+                or b == 95 or b == 45)
+
+    @njit(parallel=True, cache=True)
+    def _sanitize_ascii_kernel(data, offsets):
+        """Keep [A-Za-z0-9_-] bytes of every string in an Arrow string buffer."""
+        n = len(offsets) - 1
+        lengths = np.zeros(n, np.int64)
+        for i in prange(n):
+            kept = 0
+            for j in range(offsets[i], offsets[i + 1]):
+                if _is_kept_byte(data[j]):
+                    kept += 1
+            lengths[i] = kept
+        
+        new_offsets = np.zeros(n + 1, np.int32)
+        new_offsets[1:] = np.cumsum(lengths)
+        out = np.empty(new_offsets[n], np.uint8)
+        for i in prange(n):
+            pos = new_offsets[i]
+            for j in range(offsets[i], offsets[i + 1]):
+                if _is_kept_byte(data[j]):
+                    out[pos] = data[j]
+                    pos += 1
+        return out, new_offsets
+
+
+def _sanitize_ascii(arr: 'pa.StringArray') -> 'pa.StringArray':
+    """Run the numba kernel over an all-ASCII Arrow string array.
+    
+    For ASCII text, stripping whitespace and removing everything but word
+    characters and hyphens reduces to keeping [A-Za-z0-9_-] bytes.
+    """
+    validity, offsets_buf, data_buf = arr.buffers()
+    offsets = np.frombuffer(offsets_buf, dtype=np.int32)[arr.offset:arr.offset + len(arr) + 1]
+    data = (np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None
+            else np.empty(0, np.uint8))
+    out, new_offsets = _sanitize_ascii_kernel(data, offsets)
+    if arr.offset:
+        validity = None if arr.null_count == 0 else pc.is_valid(arr).buffers()[1]
+    return pa.StringArray.from_buffers(
+        len(arr), pa.py_buffer(new_offsets), pa.py_buffer(out),
+        validity, arr.null_count
+    )
+
+
+def _clean_article_numbers(values: pd.Series) -> pd.Series:
+    """Strip article numbers down to word characters and hyphens.
+    
+    Missing values stay missing so that they can be dropped afterwards.
+    """
+    if pc is None or len(values) < _ARROW_MIN_ROWS:
+        # Same string dtype as the Arrow path, so both sheets' categories match
+        return (
+            values
+            .astype('string' if pa is None else 'string[pyarrow]')
+            .str.strip()
+            .str.replace(_ART_RE, '', regex=True)  # Keep only alphanumeric and hyphens
+        )
+    
+    arr = pa.array(values.astype('string'), type=pa.string())
+    if (njit is not None and len(arr) >= _NUMBA_MIN_ROWS
+            and pc.all(pc.string_is_ascii(arr)).as_py()):
+        arr = _sanitize_ascii(arr)
+    else:
+        arr = pc.replace_substring_regex(
+            pc.utf8_trim_whitespace(arr), pattern=_ARROW_ART_PATTERN, replacement=''
+        )
+    return pd.Series(pd.array(arr, dtype='string[pyarrow]'), index=values.index, name=values.name)
+
+
+# infer_dtype results of object columns holding only numbers (and missing cells)
+_NUMERIC_INFERRED = frozenset({'integer', 'floating', 'mixed-integer-float'})
+
+
+def _coerce_prices(cleaned: pd.Series) -> np.ndarray:
+    """Parse cleaned price strings; values that are not numbers become NaN.
+    
+    Empty strings are missing prices; every other value that fails to parse
+    is counted and logged.
+    """
+    prices = pd.to_numeric(cleaned, errors='coerce')
+    n_invalid = int(prices.isna().sum()) - int(cleaned.fillna('').eq('').sum())
+    if n_invalid > 0:
+        logger.warning("Dropped %d prices that are not numbers", n_invalid)
+    return prices.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _clean_prices(values: pd.Series) -> pd.Series:
+    """Convert raw price cells to float64, removing currency symbols and separators.
+    
+    Empty, missing and unparseable cells become NaN.
+    """
+    # Columns read from all-numeric cells need no text cleaning at all
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype('float64')
+    
+    # Object columns mixing numeric cells with a few text cells: only the
+    # text cells go through the string cleaning below
+    if values.dtype == object:
+        inferred = pd.api.types.infer_dtype(values, skipna=True)
+        if inferred in _NUMERIC_INFERRED:
+            return values.astype('float64')
+        if inferred == 'mixed':
+            is_text = np.fromiter((isinstance(v, str) for v in values.array), dtype=bool, count=len(values))
+            if pd.api.types.infer_dtype(values[~is_text], skipna=True) in _NUMERIC_INFERRED:
+                prices = values.where(~is_text).astype('float64')
+                prices[is_text] = _clean_prices(values[is_text].astype('string'))
+                return prices
+    
+    if pc is None or len(values) < _ARROW_MIN_ROWS:
+        cleaned = (
+            values
+            .astype('string')
+            .str.replace(_PRICE_RE, _price_repl, regex=True)  # Strip currency/spaces, decimal comma -> dot
+        )
+        return pd.Series(_coerce_prices(cleaned), index=values.index, name=values.name)
+    
+    arr = pa.array(values.astype('string'), type=pa.string())
+    arr = pc.replace_substring_regex(arr, pattern=_ARROW_DECIMAL_PATTERN, replacement=r'.\1')
+    arr = pc.replace_substring_regex(arr, pattern=_ARROW_STRIP_PATTERN, replacement='')
+    arr = pc.if_else(pc.equal(arr, ''), pa.scalar(None, pa.string()), arr)
+    try:
+        prices = pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid:
+        # Some values are not numbers; let pandas coerce just those to NaN
+        prices = _coerce_prices(arr.to_pandas())
+    return pd.Series(prices, index=values.index, name=values.name)
+
+
+def _read_sheet(source, sheet_name: str, article_col: str, price_col: str) -> pd.DataFrame:
+    """Read the article and price columns of one sheet, article numbers as strings.
+    
+    source is a workbook path or an open pd.ExcelFile.
+    """
+    return pd.read_excel(
+        source,
+        sheet_name=sheet_name,
+        usecols=[article_col, price_col],
+        dtype={article_col: 'string'},
+        engine=_EXCEL_ENGINE
+    )
+
+
+def _clean_frame(df: pd.DataFrame, article_col: str, price_col: str) -> pd.DataFrame:
+    """Rename a sheet's key columns to article_number/price and clean them.
+    
+    Rows with a missing or empty article number or a missing price are dropped.
+    """
+    df = df.rename(columns={article_col: 'article_number', price_col: 'price'})
+    df['article_number'] = _clean_article_numbers(df['article_number'])
+    df['price'] = _clean_prices(df['price'])  # Remove currency symbols and convert to numeric
+    df = df.dropna(subset=['article_number', 'price'])
+    return df[df['article_number'] != '']
+
+
+# The merged source column is a categorical over these three labels; the
+# _SOURCE_* constants are their codes
+_SOURCE_DTYPE = pd.CategoricalDtype(['Tabelle1', 'Bestand Odoo', 'Both (Tabelle1 priority)'])
+_SOURCE_TABELLE1, _SOURCE_BESTAND, _SOURCE_BOTH = range(3)
+
+# Columns printed for each of the top price changes in the analytics report
+_TOP_CHANGE_COLUMNS = [
+    'article_number', 'bestand_price', 'tabelle1_price',
+    'price_difference', 'price_difference_pct'
+]
+
+
+def _top_positions(values: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """Row positions of the k largest (or smallest) values, best first.
+    
+    Matches nlargest/nsmallest with keep='first' (NaNs only fill up a short
+    result), but np.partition finds the cut-off in O(N) and only the rows up
+    to it are sorted.
+    """
+    keys = -values if largest else values
+    is_nan = np.isnan(keys)
+    candidates = np.flatnonzero(~is_nan)
+    if 0 < k < len(candidates):
+        kth = np.partition(keys[candidates], k - 1)[k - 1]
+        candidates = candidates[keys[candidates] <= kth]
+    top = candidates[np.argsort(keys[candidates], kind='stable')[:k]]
+    if len(top) < k:
+        top = np.concatenate([top, np.flatnonzero(is_nan)[:k - len(top)]])
+    return top
+
+
+def _concat_columns(first: pd.Series, second: pd.Series) -> pd.Series:
+    """Append one column to another without going through pd.concat.
+    
+    Categoricals sharing the same dtype are joined on their codes and keep
+    their categories.
+    """
+    if isinstance(first.dtype, pd.CategoricalDtype) and first.dtype == second.dtype:
+        codes = np.concatenate([first.cat.codes.to_numpy(), second.cat.codes.to_numpy()])
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=first.dtype))
+    return pd.Series(np.concatenate([first.to_numpy(), second.to_numpy()]))
+
+
 class PriceAnalyzer:
     """Analyzes and merges purchase price data from Excel sheets."""
     
-    def __init__(self, excel_path: str):
-        """Initialize the analyzer with Excel file path."""
+    def __init__(self, excel_path: str, parquet_cache: bool = False):
+        """Initialize the analyzer with Excel file path.
+        
+        With parquet_cache, the two sheets read from the workbook are also
+        stored as Parquet files next to it and reused while they are newer
+        than the workbook.
+        """
         self.excel_path = excel_path
+        self.parquet_cache = parquet_cache
         self.tabelle1_data = None
         self.bestand_data = None
         self.merged_data = None
+        # Duplicate rows dropped per sheet by clean_data
+        self.duplicates_removed = {'tabelle1': 0, 'bestand_odoo': 0}
+        # Cleaned sheets before deduplication, filled on first use
+        self._raw_clean_tabelle1 = None
+        self._raw_clean_bestand = None
+        # (tabelle1 frame, bestand frame, result) of the last _ensure_common call
+        self._common_cache = None
         
     def load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Load data from both Excel sheets."""
         try:
-            logger.info(f"Loading data from {self.excel_path}")
+            logger.info("Loading data from %s", self.excel_path)
+            self._raw_clean_tabelle1 = self._raw_clean_bestand = None
             
-            # Load Tabelle1 sheet
-            self.tabelle1_data = pd.read_excel(
-                self.excel_path, 
-                sheet_name='Tabelle1',
-                usecols=['Artnr', 'Fielmann EK']
-            )
-            logger.info(f"Loaded Tabelle1: {len(self.tabelle1_data)} rows")
+            if Path(self.excel_path).suffix == '.parquet':
+                return self._load_parquet()
             
-            # Load Bestand Odoo sheet
-            self.bestand_data = pd.read_excel(
-                self.excel_path, 
-                sheet_name='Bestand Odoo',
-                usecols=['Interne Referenz', 'Kosten']
-            )
-            logger.info(f"Loaded Bestand Odoo: {len(self.bestand_data)} rows")
+            if self.parquet_cache and self._load_parquet_cache():
+                return self.tabelle1_data, self.bestand_data
+            
+            # Article numbers are read as strings so numeric and text cells are
+            # treated alike and empty cells stay missing
+            if _EXCEL_ENGINE == 'calamine':
+                # calamine parses in native code, so both sheets are read
+                # concurrently, each thread with its own workbook handle
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    tabelle1_future = pool.submit(
+                        _read_sheet, self.excel_path, 'Tabelle1', 'Artnr', 'Fielmann EK'
+                    )
+                    bestand_future = pool.submit(
+                        _read_sheet, self.excel_path, 'Bestand Odoo', 'Interne Referenz', 'Kosten'
+                    )
+                    self.tabelle1_data = tabelle1_future.result()
+                    self.bestand_data = bestand_future.result()
+            else:
+                # openpyxl is pure Python; open the workbook once and read both
+                # sheets from the same handle
+                with pd.ExcelFile(self.excel_path, engine=_EXCEL_ENGINE) as xls:
+                    self.tabelle1_data = _read_sheet(xls, 'Tabelle1', 'Artnr', 'Fielmann EK')
+                    self.bestand_data = _read_sheet(
+                        xls, 'Bestand Odoo', 'Interne Referenz', 'Kosten'
+                    )
+            logger.info("Loaded Tabelle1: %d rows", len(self.tabelle1_data))
+            logger.info("Loaded Bestand Odoo: %d rows", len(self.bestand_data))
+            
+            if self.parquet_cache:
+                self._write_parquet_cache()
             
             return self.tabelle1_data, self.bestand_data
             
         except FileNotFoundError:
-            logger.error(f"Excel file not found: {self.excel_path}")
+            logger.error("Excel file not found: %s", self.excel_path)
             raise
         except Exception as e:
-            logger.error(f"Error loading data: {str(e)}")
+            logger.error("Error loading data: %s", e)
             raise
     
+    def _parquet_cache_paths(self) -> Tuple[Path, Path]:
+        """Paths of the Parquet cache files for the Tabelle1 and Bestand Odoo sheets."""
+        path = Path(self.excel_path)
+        return (path.with_name(f"{path.stem}.cache.parquet"),
+                path.with_name(f"{path.stem}_bestand.cache.parquet"))
+    
+    def _load_parquet_cache(self) -> bool:
+        """Load both sheets from the Parquet cache if it is newer than the workbook."""
+        if pa is None:
+            return False
+        
+        workbook_mtime = Path(self.excel_path).stat().st_mtime
+        cache_paths = self._parquet_cache_paths()
+        if not all(p.is_file() and p.stat().st_mtime >= workbook_mtime for p in cache_paths):
+            return False
+        
+        self.tabelle1_data = pd.read_parquet(cache_paths[0])
+        self.bestand_data = pd.read_parquet(cache_paths[1])
+        logger.info("Loaded Tabelle1 from Parquet cache: %d rows", len(self.tabelle1_data))
+        logger.info("Loaded Bestand Odoo from Parquet cache: %d rows", len(self.bestand_data))
+        return True
+    
+    def _write_parquet_cache(self) -> None:
+        """Store both freshly read sheets in the Parquet cache.
+        
+        Sheets whose price column mixes text and numbers cannot be stored
+        losslessly; those are not cached.
+        """
+        if pa is None:
+            return
+        
+        tabelle1_path, bestand_path = self._parquet_cache_paths()
+        try:
+            self.tabelle1_data.to_parquet(tabelle1_path, index=False)
+            self.bestand_data.to_parquet(bestand_path, index=False)
+        except (pa.ArrowException, OSError) as e:
+            logger.warning("Could not write Parquet cache: %s", e)
+            tabelle1_path.unlink(missing_ok=True)
+            bestand_path.unlink(missing_ok=True)
+    
+    def _load_parquet(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Load both sheets from Parquet files instead of an Excel workbook.
+        
+        The Tabelle1 data is read from ``excel_path`` itself and the Bestand Odoo
+        data from the companion file ``<stem>_bestand.parquet`` next to it.
+        """
+        path = Path(self.excel_path)
+        bestand_path = path.with_name(f"{path.stem}_bestand.parquet")
+        
+        self.tabelle1_data = pd.read_parquet(path, columns=['Artnr', 'Fielmann EK'])
+        logger.info("Loaded Tabelle1: %d rows", len(self.tabelle1_data))
+        
+        self.bestand_data = pd.read_parquet(bestand_path, columns=['Interne Referenz', 'Kosten'])
+        logger.info("Loaded Bestand Odoo: %d rows", len(self.bestand_data))
+        
+        return self.tabelle1_data, self.bestand_data
+    
+    def _raw_clean_sheets(self) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+        """Return both sheets cleaned and renamed but not yet deduplicated.
+        
+        The string cleaning runs once per loaded sheet; the results are shared by
+        analyze_duplicates_within_sheets and clean_data.
+        """
+        if self._raw_clean_tabelle1 is None and self.tabelle1_data is not None:
+            self._raw_clean_tabelle1 = _clean_frame(self.tabelle1_data, 'Artnr', 'Fielmann EK')
+        if self._raw_clean_bestand is None and self.bestand_data is not None:
+            self._raw_clean_bestand = _clean_frame(self.bestand_data, 'Interne Referenz', 'Kosten')
+        return self._raw_clean_tabelle1, self._raw_clean_bestand
+    
     def clean_data(self) -> None:
         """Clean and standardize the data."""
         logger.info("Cleaning and standardizing data...")
         
+        tabelle1_clean, bestand_clean = self._raw_clean_sheets()
+        
         # Clean Tabelle1 data
-        if self.tabelle1_data is not None:
-            # Rename columns for consistency
-            self.tabelle1_data = self.tabelle1_data.rename(columns={
-                'Artnr': 'article_number',
-                'Fielmann EK': 'price'
-            })
-            
-            # Clean article numbers
-            self.tabelle1_data['article_number'] = (
-                self.tabelle1_data['article_number']
-                .astype(str)
-                .str.strip()
-                .str.replace(r'[^\w\-]', '', regex=True)  # Keep only alphanumeric and hyphens
-            )
-            
-            # Clean prices - remove currency symbols and convert to numeric
-            self.tabelle1_data['price'] = (
-                self.tabelle1_data['price']
-                .astype(str)
-                .str.replace(r'[€$£¥,\s]', '', regex=True)  # Remove currency symbols and spaces
-                .str.replace(',', '.')  # Replace comma with dot for decimal
-                .replace('', np.nan)  # Replace empty strings with NaN
-                .astype(float)
-            )
-            
-            # Remove rows with missing article numbers or prices
-            self.tabelle1_data = self.tabelle1_data.dropna(subset=['article_number', 'price'])
-            self.tabelle1_data = self.tabelle1_data[self.tabelle1_data['article_number'] != '']
+        if tabelle1_clean is not None:
+            self.tabelle1_data = tabelle1_clean
             
             # Handle duplicates: keep only the entry with the lowest price for each article
+            # (stable sort, so ties keep the first entry). The result is ordered
+            # by article number, as the merged output always has been
             initial_count = len(self.tabelle1_data)
-            self.tabelle1_data = self.tabelle1_data.loc[
-                self.tabelle1_data.groupby('article_number')['price'].idxmin()
-            ].reset_index(drop=True)
+            self.tabelle1_data = (
+                self.tabelle1_data
+                .sort_values('price', kind='stable')
+                .drop_duplicates('article_number', keep='first')
+                .sort_values('article_number', kind='stable')
+                .reset_index(drop=True)
+            )
             duplicates_removed = initial_count - len(self.tabelle1_data)
+            self.duplicates_removed['tabelle1'] = duplicates_removed
             
             if duplicates_removed > 0:
-                logger.info(f"Removed {duplicates_removed} duplicate entries from Tabelle1, keeping lowest prices")
+                logger.info("Removed %d duplicate entries from Tabelle1, keeping lowest prices", duplicates_removed)
             
-            logger.info(f"Tabelle1 after cleaning: {len(self.tabelle1_data)} rows")
+            logger.info("Tabelle1 after cleaning: %d rows", len(self.tabelle1_data))
         
         # Clean Bestand Odoo data
-        if self.bestand_data is not None:
-            # Rename columns for consistency
-            self.bestand_data = self.bestand_data.rename(columns={
-                'Interne Referenz': 'article_number',
-                'Kosten': 'price'
-            })
-            
-            # Clean article numbers
-            self.bestand_data['article_number'] = (
-                self.bestand_data['article_number']
-                .astype(str)
-                .str.strip()
-                .str.replace(r'[^\w\-]', '', regex=True)
+        if bestand_clean is not None:
+            # Keep one row per article (the first entry, which is also the one
+            # used for the price comparison), so later joins are one-to-one
+            self.bestand_data = bestand_clean.drop_duplicates(
+                'article_number', keep='first', ignore_index=True
             )
+            duplicates_removed = len(bestand_clean) - len(self.bestand_data)
+            self.duplicates_removed['bestand_odoo'] = duplicates_removed
             
-            # Clean prices
-            self.bestand_data['price'] = (
-                self.bestand_data['price']
-                .astype(str)
-                .str.replace(r'[€$£¥,\s]', '', regex=True)
-                .str.replace(',', '.')
-                .replace('', np.nan)
-                .astype(float)
-            )
-            
-            # Remove rows with missing article numbers or prices
-            self.bestand_data = self.bestand_data.dropna(subset=['article_number', 'price'])
-            self.bestand_data = self.bestand_data[self.bestand_data['article_number'] != '']
+            if duplicates_removed > 0:
+                logger.info("Removed %d duplicate entries from Bestand Odoo, keeping first entries", duplicates_removed)
             
-            logger.info(f"Bestand Odoo after cleaning: {len(self.bestand_data)} rows")
+            logger.info("Bestand Odoo after cleaning: %d rows", len(self.bestand_data))
+        
+        self._downcast_columns()
+        
+        # Build the unique/common article indexes once for all later analyses
+        if self.tabelle1_data is not None and self.bestand_data is not None:
+            self._ensure_common()
+    
+    def _downcast_columns(self) -> None:
+        """Shrink the columns of both cleaned sheets.
+        
+        Article numbers become a categorical shared by both sheets, so groupbys,
+        merges and membership tests compare integer codes instead of hashing
+        strings. Prices stay float64, which keeps the price differences exact
+        to the cent at any price.
+        """
+        frames = [df for df in (self.tabelle1_data, self.bestand_data) if df is not None]
+        if not frames:
+            return
+        
+        articles = union_categoricals(
+            [pd.Categorical(df['article_number']) for df in frames],
+            sort_categories=True
+        )
+        article_dtype = pd.CategoricalDtype(articles.categories)
+        # assign() leaves the cached pre-deduplication frames untouched
+        if self.tabelle1_data is not None:
+            self.tabelle1_data = self.tabelle1_data.assign(
+                article_number=self.tabelle1_data['article_number'].astype(article_dtype)
+            )
+        if self.bestand_data is not None:
+            self.bestand_data = self.bestand_data.assign(
+                article_number=self.bestand_data['article_number'].astype(article_dtype)
+            )
     
     def analyze_duplicates_within_sheets(self) -> Dict[str, Any]:
         """Analyzes duplicates within each sheet for price variations."""
         logger.info("Analyzing duplicates within each sheet...")
         
-        # Analyze duplicates in Tabelle1 (using original column names)
-        tabelle1_duplicates = self._analyze_sheet_duplicates_raw(
-            self.tabelle1_data, 'Tabelle1', 'Artnr', 'Fielmann EK'
-        )
-        
-        # Analyze duplicates in Bestand Odoo (using original column names)
-        bestand_duplicates = self._analyze_sheet_duplicates_raw(
-            self.bestand_data, 'Bestand Odoo', 'Interne Referenz', 'Kosten'
-        )
+        # Duplicates are analyzed on the cleaned sheets before Tabelle1 is deduplicated
+        tabelle1_clean, bestand_clean = self._raw_clean_sheets()
+        tabelle1_duplicates = self._analyze_sheet_duplicates(tabelle1_clean, 'Tabelle1')
+        bestand_duplicates = self._analyze_sheet_duplicates(bestand_clean, 'Bestand Odoo')
         
         return {
             'tabelle1': tabelle1_duplicates,
             'bestand_odoo': bestand_duplicates
         }
 
-    def _analyze_sheet_duplicates_raw(self, df: pd.DataFrame, sheet_name: str, 
-                                     article_col: str, price_col: str) -> Dict[str, Any]:
-        """Helper function to analyze duplicates in a single dataframe with original column names."""
-        if df is None:
-            return {'total_duplicates': 0, 'duplicates_with_price_diff': 0, 'details': []}
-        
-        # Clean the data for analysis (similar to clean_data but without modifying the original)
-        df_clean = df.copy()
-        
-        # Clean article numbers
-        df_clean[article_col] = (
-            df_clean[article_col]
-            .astype(str)
-            .str.strip()
-            .str.replace(r'[^\w\-]', '', regex=True)
-        )
-        
-        # Clean prices
-        df_clean[price_col] = (
-            df_clean[price_col]
-            .astype(str)
-            .str.replace(r'[€$£¥,\s]', '', regex=True)
-            .str.replace(',', '.')
-            .replace('', np.nan)
-            .astype(float)
-        )
-        
-        # Remove rows with missing article numbers or prices
-        df_clean = df_clean.dropna(subset=[article_col, price_col])
-        df_clean = df_clean[df_clean[article_col] != '']
-        
-        # Find all rows with duplicated article numbers
-        duplicates = df_clean[df_clean[article_col].duplicated(keep=False)]
-        
-        if duplicates.empty:
-            logger.info(f"No duplicates found in {sheet_name}")
-            return {'total_duplicates': 0, 'duplicates_with_price_diff': 0, 'details': []}
-
-        total_duplicates = duplicates[article_col].nunique()
-        
-        # Group by article number and check for price variations
-        price_diff_details = []
-        duplicates_with_price_diff = 0
-        
-        for article, group in duplicates.groupby(article_col):
-            if group[price_col].nunique() > 1:
-                duplicates_with_price_diff += 1
-                price_diff_details.append({
-                    'article_number': article,
-                    'prices': sorted(list(group[price_col].unique())),
-                    'price_mean': group[price_col].mean(),
-                    'price_std': group[price_col].std(),
-                    'price_min': group[price_col].min(),
-                    'price_max': group[price_col].max(),
-                })
-                
-        logger.info(f"Found {total_duplicates} articles with duplicates in {sheet_name}.")
-        logger.info(f"{duplicates_with_price_diff} of them have different prices.")
-        
-        return {
-            'total_duplicates': total_duplicates,
-            'duplicates_with_price_diff': duplicates_with_price_diff,
-            'details': price_diff_details
-        }
-
     def _analyze_sheet_duplicates(self, df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
         """Helper function to analyze duplicates in a single dataframe."""
         if df is None:
@@ -233,29 +517,36 @@ class PriceAnalyzer:
         duplicates = df[df['article_number'].duplicated(keep=False)]
         
         if duplicates.empty:
-            logger.info(f"No duplicates found in {sheet_name}")
+            logger.info("No duplicates found in %s", sheet_name)
             return {'total_duplicates': 0, 'duplicates_with_price_diff': 0, 'details': []}
 
         total_duplicates = duplicates['article_number'].nunique()
         
-        # Group by article number and check for price variations
-        price_diff_details = []
-        duplicates_with_price_diff = 0
-        
-        for article, group in duplicates.groupby('article_number'):
-            if group['price'].nunique() > 1:
-                duplicates_with_price_diff += 1
-                price_diff_details.append({
-                    'article_number': article,
-                    'prices': sorted(list(group['price'].unique())),
-                    'price_mean': group['price'].mean(),
-                    'price_std': group['price'].std(),
-                    'price_min': group['price'].min(),
-                    'price_max': group['price'].max(),
-                })
+        # Per-article price statistics in one grouped pass; only articles whose
+        # duplicates disagree on the price are reported
+        grouped = duplicates.groupby('article_number', observed=True)['price']
+        stats = grouped.agg(
+            n_prices='nunique', price_mean='mean', price_std='std',
+            price_min='min', price_max='max'
+        )
+        stats = stats[stats['n_prices'] > 1]
+        duplicates_with_price_diff = len(stats)
+        
+        prices = grouped.unique().loc[stats.index].map(lambda a: sorted(a.tolist()))
+        price_diff_details = [
+            {
+                'article_number': record['article_number'],
+                'prices': record_prices,
+                'price_mean': record['price_mean'],
+                'price_std': record['price_std'],
+                'price_min': record['price_min'],
+                'price_max': record['price_max'],
+            }
+            for record, record_prices in zip(stats.reset_index().to_dict('records'), prices)
+        ]
                 
-        logger.info(f"Found {total_duplicates} articles with duplicates in {sheet_name}.")
-        logger.info(f"{duplicates_with_price_diff} of them have different prices.")
+        logger.info("Found %d articles with duplicates in %s.", total_duplicates, sheet_name)
+        logger.info("%d of them have different prices.", duplicates_with_price_diff)
         
         return {
             'total_duplicates': total_duplicates,
@@ -263,20 +554,53 @@ class PriceAnalyzer:
             'details': price_diff_details
         }
 
+    def _ensure_common(self) -> Tuple[int, int, pd.Index]:
+        """Return the unique article counts of both sheets and their common articles.
+        
+        The result is computed once per pair of cleaned frames. With the shared
+        categorical from clean_data the intersection runs on integer codes.
+        """
+        cache = self._common_cache
+        if cache is not None and cache[0] is self.tabelle1_data and cache[1] is self.bestand_data:
+            return cache[2]
+        
+        tabelle1_articles = self.tabelle1_data['article_number']
+        bestand_articles = self.bestand_data['article_number']
+        if (isinstance(tabelle1_articles.dtype, pd.CategoricalDtype)
+                and tabelle1_articles.dtype == bestand_articles.dtype):
+            tabelle1_codes = tabelle1_articles.cat.codes.unique()
+            bestand_codes = bestand_articles.cat.codes.unique()
+            common_codes = np.intersect1d(tabelle1_codes, bestand_codes, assume_unique=True)
+            common = tabelle1_articles.cat.categories[common_codes]
+            result = (len(tabelle1_codes), len(bestand_codes), common)
+        else:
+            tabelle1_unique = pd.Index(tabelle1_articles.unique())
+            bestand_unique = pd.Index(bestand_articles.unique())
+            result = (len(tabelle1_unique), len(bestand_unique),
+                      tabelle1_unique.intersection(bestand_unique))
+        
+        self._common_cache = (self.tabelle1_data, self.bestand_data, result)
+        return result
+    
+    def _has_both_sheets(self) -> bool:
+        """Whether both sheets are loaded and non-empty."""
+        return (self.tabelle1_data is not None and self.bestand_data is not None
+                and not self.tabelle1_data.empty and not self.bestand_data.empty)
+    
     def analyze_common_articles(self) -> Dict[str, Any]:
         """Analyze common articles between both sheets."""
         logger.info("Analyzing common articles...")
         
-        # Get unique article numbers from both sheets
-        tabelle1_articles = set(self.tabelle1_data['article_number'].unique())
-        bestand_articles = set(self.bestand_data['article_number'].unique())
-        
-        # Find common articles
-        common_articles = tabelle1_articles.intersection(bestand_articles)
+        if self._has_both_sheets():
+            # Unique and common article numbers (shared with merge_data)
+            total_tabelle1, total_bestand, common_articles = self._ensure_common()
+        else:
+            # Nothing can be in common; skip the intersection entirely
+            total_tabelle1 = 0 if self.tabelle1_data is None else self.tabelle1_data['article_number'].nunique()
+            total_bestand = 0 if self.bestand_data is None else self.bestand_data['article_number'].nunique()
+            common_articles = []
         
         # Calculate statistics
-        total_tabelle1 = len(tabelle1_articles)
-        total_bestand = len(bestand_articles)
         total_common = len(common_articles)
         
         overlap_tabelle1 = (total_common / total_tabelle1 * 100) if total_tabelle1 > 0 else 0
@@ -291,9 +615,9 @@ class PriceAnalyzer:
             'common_articles': list(common_articles)
         }
         
-        logger.info(f"Common articles found: {total_common}")
-        logger.info(f"Overlap with Tabelle1: {overlap_tabelle1:.2f}%")
-        logger.info(f"Overlap with Bestand Odoo: {overlap_bestand:.2f}%")
+        logger.info("Common articles found: %d", total_common)
+        logger.info("Overlap with Tabelle1: %.2f%%", overlap_tabelle1)
+        logger.info("Overlap with Bestand Odoo: %.2f%%", overlap_bestand)
         
         return analysis
     
@@ -301,45 +625,46 @@ class PriceAnalyzer:
         """Analyze price differences for common articles."""
         logger.info("Analyzing price differences...")
         
-        # Get common articles
-        common_articles = set(self.tabelle1_data['article_number']).intersection(
-            set(self.bestand_data['article_number'])
-        )
-        
-        if not common_articles:
+        # Nothing to compare when a sheet is empty or no article is shared
+        if not self._has_both_sheets() or len(self._ensure_common()[2]) == 0:
             logger.warning("No common articles found for price comparison")
             return pd.DataFrame()
         
-        # Create comparison dataframe
-        price_comparison = []
+        # Join both price columns on the article number in a single pass
+        # (the first entry per article is used, as Bestand Odoo may contain
+        # several entries for the same article)
+        comparison_df = (
+            self.tabelle1_data[['article_number', 'price']]
+            .drop_duplicates('article_number')
+            .merge(
+                self.bestand_data[['article_number', 'price']].drop_duplicates('article_number'),
+                on='article_number',
+                how='inner',
+                suffixes=('_tab', '_best'),
+                validate='one_to_one'
+            )
+            .rename(columns={'price_tab': 'tabelle1_price', 'price_best': 'bestand_price'})
+        )
         
-        for article in common_articles:
-            tabelle1_price = self.tabelle1_data[
-                self.tabelle1_data['article_number'] == article
-            ]['price'].iloc[0]
-            
-            bestand_price = self.bestand_data[
-                self.bestand_data['article_number'] == article
-            ]['price'].iloc[0]
-            
-            price_diff = tabelle1_price - bestand_price
-            price_diff_pct = (price_diff / bestand_price * 100) if bestand_price != 0 else 0
-            
-            price_comparison.append({
-                'article_number': article,
-                'tabelle1_price': tabelle1_price,
-                'bestand_price': bestand_price,
-                'price_difference': price_diff,
-                'price_difference_pct': price_diff_pct
-            })
+        if comparison_df.empty:
+            logger.warning("No common articles found for price comparison")
+            return pd.DataFrame()
         
-        comparison_df = pd.DataFrame(price_comparison)
+        comparison_df['price_difference'] = (
+            comparison_df['tabelle1_price'] - comparison_df['bestand_price']
+        )
+        comparison_df['price_difference_pct'] = np.where(
+            comparison_df['bestand_price'] != 0,
+            comparison_df['price_difference'] / comparison_df['bestand_price'] * 100,
+            0.0
+        )
         
-        # Generate statistics
-        logger.info(f"Price comparison completed for {len(comparison_df)} articles")
-        logger.info(f"Average price difference: {comparison_df['price_difference'].mean():.2f}")
-        logger.info(f"Median price difference: {comparison_df['price_difference'].median():.2f}")
-        logger.info(f"Average price difference %: {comparison_df['price_difference_pct'].mean():.2f}%")
+        # Generate statistics (only when they will actually be logged)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Price comparison completed for %d articles", len(comparison_df))
+            logger.info("Average price difference: %.2f", comparison_df['price_difference'].mean())
+            logger.info("Median price difference: %.2f", comparison_df['price_difference'].median())
+            logger.info("Average price difference %%: %.2f%%", comparison_df['price_difference_pct'].mean())
         
         return comparison_df
     
@@ -347,128 +672,172 @@ class PriceAnalyzer:
         """Merge data with Tabelle1 prices taking priority."""
         logger.info("Merging data...")
         
-        # Start with Tabelle1 data (highest priority)
-        merged = self.tabelle1_data.copy()
-        merged['source'] = 'Tabelle1'
+        # Both membership tests run against the cached common articles: a
+        # Tabelle1 article is in Bestand Odoo (and vice versa) iff it is common
+        _, _, common_articles = self._ensure_common()
+        in_bestand = self.tabelle1_data['article_number'].isin(common_articles)
+        
+        # Tabelle1 rows come first (highest priority); articles also present in
+        # Bestand Odoo are marked as common
+        tabelle1 = self.tabelle1_data
+        tabelle1_source = np.where(in_bestand.to_numpy(), _SOURCE_BOTH, _SOURCE_TABELLE1).astype(np.int8)
         
         # Add articles from Bestand Odoo that are not in Tabelle1
         bestand_only = self.bestand_data[
-            ~self.bestand_data['article_number'].isin(merged['article_number'])
-        ].copy()
-        bestand_only['source'] = 'Bestand Odoo'
-        
-        # Combine both datasets
-        self.merged_data = pd.concat([merged, bestand_only], ignore_index=True)
-        
-        # Add source information for common articles
-        common_articles = set(self.tabelle1_data['article_number']).intersection(
-            set(self.bestand_data['article_number'])
-        )
-        
-        # Update source for common articles
-        self.merged_data.loc[
-            self.merged_data['article_number'].isin(common_articles), 
-            'source'
-        ] = 'Both (Tabelle1 priority)'
-        
-        logger.info(f"Merged data: {len(self.merged_data)} total articles")
-        logger.info(f"From Tabelle1 only: {len(merged)} articles")
-        logger.info(f"From Bestand Odoo only: {len(bestand_only)} articles")
-        logger.info(f"Common articles (Tabelle1 priority): {len(common_articles)} articles")
+            ~self.bestand_data['article_number'].isin(common_articles)
+        ]
+        
+        # Build the combined frame once from the column arrays; neither input
+        # is copied just to attach a source column
+        self.merged_data = pd.DataFrame({
+            'article_number': _concat_columns(tabelle1['article_number'], bestand_only['article_number']),
+            'price': _concat_columns(tabelle1['price'], bestand_only['price']),
+            'source': pd.Categorical.from_codes(
+                np.concatenate([
+                    tabelle1_source,
+                    np.full(len(bestand_only), _SOURCE_BESTAND, dtype=np.int8)
+                ]),
+                dtype=_SOURCE_DTYPE
+            ),
+        })
+        
+        logger.info("Merged data: %d total articles", len(self.merged_data))
+        logger.info("From Tabelle1 only: %d articles", len(tabelle1))
+        logger.info("From Bestand Odoo only: %d articles", len(bestand_only))
+        logger.info("Common articles (Tabelle1 priority): %d articles", len(common_articles))
         
         return self.merged_data
     
     def save_results(self, output_path: str) -> None:
-        """Save the merged data to CSV."""
+        """Save the merged data to CSV (gzip-compressed if output_path ends in .gz)."""
         if self.merged_data is None:
             logger.error("No merged data to save. Run merge_data() first.")
             return
         
         try:
-            # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            # Ensure output directory exists (also for a bare file name)
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
             
-            # Save to CSV
-            self.merged_data.to_csv(output_path, index=False)
-            logger.info(f"Results saved to {output_path}")
+            # Save to CSV; Arrow's multi-threaded writer when pyarrow is installed.
+            # Compressed output is streamed through gzip instead of written first
+            if pa_csv is None:
+                if output_path.endswith('.gz'):
+                    self.merged_data.to_csv(output_path, index=False)
+                else:
+                    # Stream into a large write buffer rather than many small writes
+                    with open(output_path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                        self.merged_data.to_csv(f, index=False)
+            else:
+                table = pa.Table.from_pandas(self.merged_data, preserve_index=False)
+                if output_path.endswith('.gz'):
+                    with pa.CompressedOutputStream(output_path, 'gzip') as sink:
+                        pa_csv.write_csv(table, sink)
+                else:
+                    pa_csv.write_csv(table, output_path)
+            logger.info("Results saved to %s", output_path)
             
         except Exception as e:
-            logger.error(f"Error saving results: {str(e)}")
+            logger.error("Error saving results: %s", e)
             raise
     
     def generate_analytics_report(self, price_comparison: pd.DataFrame, duplicate_analysis: Dict[str, Any]) -> None:
         """Generate and display analytics report."""
         logger.info("Generating analytics report...")
         
-        print("\n" + "="*60)
-        print("PURCHASE PRICE ANALYSIS REPORT")
-        print("="*60)
+        # Collect the report lines and print them at once
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("PURCHASE PRICE ANALYSIS REPORT")
+        lines.append("="*60)
         
         # Basic statistics
-        print(f"\n📊 DATA OVERVIEW:")
-        print(f"   • Tabelle1 articles: {len(self.tabelle1_data):,}")
-        print(f"   • Bestand Odoo articles: {len(self.bestand_data):,}")
-        print(f"   • Common articles: {len(set(self.tabelle1_data['article_number']).intersection(set(self.bestand_data['article_number']))):,}")
-        print(f"   • Final merged articles: {len(self.merged_data):,}")
+        lines.append(f"\n📊 DATA OVERVIEW:")
+        lines.append(f"   • Tabelle1 articles: {len(self.tabelle1_data):,}")
+        lines.append(f"   • Bestand Odoo articles: {len(self.bestand_data):,}")
+        lines.append(f"   • Common articles: {len(self._ensure_common()[2]):,}")
+        lines.append(f"   • Final merged articles: {len(self.merged_data):,}")
         
         # Price analysis
         if not price_comparison.empty:
-            print(f"\n💰 PRICE ANALYSIS:")
-            print(f"   • Average price difference: €{price_comparison['price_difference'].mean():.2f}")
-            print(f"   • Median price difference: €{price_comparison['price_difference'].median():.2f}")
-            print(f"   • Average price change %: {price_comparison['price_difference_pct'].mean():.2f}%")
-            print(f"   • Max price increase: €{price_comparison['price_difference'].max():.2f}")
-            print(f"   • Max price decrease: €{price_comparison['price_difference'].min():.2f}")
+            # All summary statistics in one aggregation call
+            stats = price_comparison.agg({
+                'price_difference': ['mean', 'median', 'max', 'min'],
+                'price_difference_pct': ['mean']
+            })
+            diff_stats = stats['price_difference']
+            
+            lines.append(f"\n💰 PRICE ANALYSIS:")
+            lines.append(f"   • Average price difference: €{diff_stats['mean']:.2f}")
+            lines.append(f"   • Median price difference: €{diff_stats['median']:.2f}")
+            lines.append(f"   • Average price change %: {stats.at['mean', 'price_difference_pct']:.2f}%")
+            lines.append(f"   • Max price increase: €{diff_stats['max']:.2f}")
+            lines.append(f"   • Max price decrease: €{diff_stats['min']:.2f}")
             
-            # Top price changes
-            print(f"\n📈 TOP 5 PRICE INCREASES:")
-            top_increases = price_comparison.nlargest(5, 'price_difference')
-            for _, row in top_increases.iterrows():
-                print(f"   • {row['article_number']}: €{row['bestand_price']:.2f} → €{row['tabelle1_price']:.2f} (+€{row['price_difference']:.2f}, +{row['price_difference_pct']:.1f}%)")
+            # Top price changes, read straight from the column arrays
+            differences = price_comparison['price_difference'].to_numpy(dtype='float64')
+            columns = [price_comparison[column].to_numpy() for column in _TOP_CHANGE_COLUMNS]
             
-            print(f"\n📉 TOP 5 PRICE DECREASES:")
-            top_decreases = price_comparison.nsmallest(5, 'price_difference')
-            for _, row in top_decreases.iterrows():
-                print(f"   • {row['article_number']}: €{row['bestand_price']:.2f} → €{row['tabelle1_price']:.2f} ({row['price_difference']:.2f}, {row['price_difference_pct']:.1f}%)")
+            lines.append(f"\n📈 TOP 5 PRICE INCREASES:")
+            top_increases = _top_positions(differences, 5, largest=True)
+            for article, bestand_price, tabelle1_price, diff, pct in zip(
+                    *(column[top_increases] for column in columns)):
+                lines.append(f"   • {article}: €{bestand_price:.2f} → €{tabelle1_price:.2f} (+€{diff:.2f}, +{pct:.1f}%)")
+            
+            lines.append(f"\n📉 TOP 5 PRICE DECREASES:")
+            top_decreases = _top_positions(differences, 5, largest=False)
+            for article, bestand_price, tabelle1_price, diff, pct in zip(
+                    *(column[top_decreases] for column in columns)):
+                lines.append(f"   • {article}: €{bestand_price:.2f} → €{tabelle1_price:.2f} ({diff:.2f}, {pct:.1f}%)")
         
         # Duplicate analysis
-        print(f"\n🔬 DUPLICATE ANALYSIS:")
+        lines.append(f"\n🔬 DUPLICATE ANALYSIS:")
         
         # Tabelle1 duplicate report
         tabelle1_dupes = duplicate_analysis['tabelle1']
-        print(f"\n   --- Tabelle1 Duplicates (Before Cleaning) ---")
-        print(f"   • Articles with duplicates found: {tabelle1_dupes['total_duplicates']:,}")
-        print(f"   • Duplicates with price differences: {tabelle1_dupes['duplicates_with_price_diff']:,}")
+        lines.append(f"\n   --- Tabelle1 Duplicates (Before Cleaning) ---")
+        lines.append(f"   • Articles with duplicates found: {tabelle1_dupes['total_duplicates']:,}")
+        lines.append(f"   • Duplicates with price differences: {tabelle1_dupes['duplicates_with_price_diff']:,}")
         if tabelle1_dupes['duplicates_with_price_diff'] > 0:
-            print("   • Articles with price differences (lowest price was kept):")
+            lines.append("   • Articles with price differences (lowest price was kept):")
             for detail in tabelle1_dupes['details'][:5]:
                 prices_str = ", ".join([f"€{p:.2f}" for p in detail['prices']])
-                print(f"     - {detail['article_number']}: Prices [{prices_str}] → Kept: €{detail['price_min']:.2f}")
-        print(f"   • Resolution: Duplicates removed, lowest prices retained")
+                lines.append(f"     - {detail['article_number']}: Prices [{prices_str}] → Kept: €{detail['price_min']:.2f}")
+        lines.append(f"   • Resolution: Duplicates removed, lowest prices retained")
 
         # Bestand Odoo duplicate report
         bestand_dupes = duplicate_analysis['bestand_odoo']
-        print(f"\n   --- Bestand Odoo Duplicates ---")
-        print(f"   • Articles with duplicates: {bestand_dupes['total_duplicates']:,}")
-        print(f"   • Duplicates with price differences: {bestand_dupes['duplicates_with_price_diff']:,}")
+        lines.append(f"\n   --- Bestand Odoo Duplicates ---")
+        lines.append(f"   • Articles with duplicates: {bestand_dupes['total_duplicates']:,}")
+        lines.append(f"   • Duplicates with price differences: {bestand_dupes['duplicates_with_price_diff']:,}")
         if bestand_dupes['duplicates_with_price_diff'] > 0:
-            print("   • Top 5 articles with price differences:")
+            lines.append("   • Top 5 articles with price differences:")
             for detail in bestand_dupes['details'][:5]:
                 prices_str = ", ".join([f"€{p:.2f}" for p in detail['prices']])
-                print(f"     - {detail['article_number']}: Prices [{prices_str}]")
+                lines.append(f"     - {detail['article_number']}: Prices [{prices_str}]")
+        if self.duplicates_removed['bestand_odoo'] > 0:
+            lines.append(f"   • Resolution: {self.duplicates_removed['bestand_odoo']:,} duplicate rows removed, first entries retained")
         
         # Data quality
-        print(f"\n🔍 DATA QUALITY:")
-        print(f"   • Missing prices in Tabelle1: {self.tabelle1_data['price'].isna().sum()}")
-        print(f"   • Missing prices in Bestand Odoo: {self.bestand_data['price'].isna().sum()}")
+        lines.append(f"\n🔍 DATA QUALITY:")
+        lines.append(f"   • Missing prices in Tabelle1: {self.tabelle1_data['price'].isna().sum()}")
+        lines.append(f"   • Missing prices in Bestand Odoo: {self.bestand_data['price'].isna().sum()}")
+        
+        lines.append("\n" + "="*60)
         
-        print("\n" + "="*60)
+        # Emit the whole report with a single write
+        print("\n".join(lines))
 
-def main():
+def main(excel_path: str = "data/purchase_price.xlsx",
+         output_path: str = "data/final_purchase_price.csv",
+         log_path: str = "price_analysis.log") -> None:
     """Main execution function."""
-    # File paths
-    excel_path = "data/purchase_price.xlsx"
-    output_path = "data/final_purchase_price.csv"
+    # The log file records every INFO message of the run, whatever the
+    # root logger is configured to
+    file_handler = logging.FileHandler(log_path)
+    file_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+    previous_level = logger.level
+    logger.setLevel(logging.INFO)
+    logger.addHandler(file_handler)
     
     try:
         # Initialize analyzer
@@ -500,8 +869,12 @@ def main():
         logger.info("Analysis completed successfully!")
         
     except Exception as e:
-        logger.error(f"Analysis failed: {str(e)}")
+        logger.error("Analysis failed: %s", e)
         raise
+    finally:
+        logger.removeHandler(file_handler)
+        logger.setLevel(previous_level)
+        file_handler.close()
 
 if __name__ == "__main__":
     main()
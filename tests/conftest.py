@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration: make the project root and src importable once.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+for path in (str(ROOT), str(ROOT / "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,48 @@
+"""
+Shared test support: the slow marker, workbook writing and temporary directories.
+"""
+
+import shutil
+import tempfile
+
+from openpyxl import Workbook
+
+try:
+    import pytest
+    slow = pytest.mark.slow
+except ImportError:
+    # run_unittest.py works without pytest; the marker is then a no-op
+    def slow(test):
+        return test
+
+
+def write_workbook(path, sheets):
+    """Write the given DataFrames as sheets of a workbook in openpyxl's write-only mode."""
+    wb = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        ws = wb.create_sheet(sheet_name)
+        ws.append(list(df.columns))
+        for row in df.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+
+# All temporary files of a test module live below one directory, removed at
+# the end; test modules import setUpModule/tearDownModule from here
+_MODULE_TMP = None
+
+
+def setUpModule():
+    """Create the temporary root directory for the current module's tests."""
+    global _MODULE_TMP
+    _MODULE_TMP = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    """Remove the temporary root directory and everything below it."""
+    shutil.rmtree(_MODULE_TMP, ignore_errors=True)
+
+
+def make_temp_dir():
+    """Create a fresh temporary directory below the module's root directory."""
+    return tempfile.mkdtemp(dir=_MODULE_TMP)
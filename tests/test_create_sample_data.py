@@ -5,17 +5,17 @@ Unit tests for the create_sample_data module.
 
 import unittest
 import pandas as pd
-import tempfile
 import os
-import shutil
-from pathlib import Path
 from unittest.mock import patch, MagicMock
-import sys
-
-# Add src directory to path for imports
-sys.path.append(str(Path(__file__).parent.parent / "src"))
 
 from create_sample_data import create_sample_data
+from tests.helpers import setUpModule, tearDownModule, make_temp_dir
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
 
 class TestCreateSampleData(unittest.TestCase):
@@ -23,45 +23,37 @@ class TestCreateSampleData(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
-        self.original_cwd = os.getcwd()
-        self.temp_dir = tempfile.mkdtemp()
-        os.chdir(self.temp_dir)
-
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir = make_temp_dir()
+        self.data_dir = os.path.join(self.temp_dir, 'data')
+        self.excel_path = os.path.join(self.data_dir, 'purchase_price.xlsx')
 
     @patch('builtins.print')
     def test_create_sample_data_creates_file(self, mock_print):
         """Test that create_sample_data creates the Excel file."""
-        create_sample_data()
+        create_sample_data(data_dir=self.data_dir)
         
         # Check that data directory was created
-        self.assertTrue(os.path.exists('data'))
+        self.assertTrue(os.path.exists(self.data_dir))
         
         # Check that Excel file was created
-        self.assertTrue(os.path.exists('data/purchase_price.xlsx'))
+        self.assertTrue(os.path.exists(self.excel_path))
         
         # Check that print statements were called
         self.assertTrue(mock_print.called)
 
     def test_create_sample_data_file_structure(self):
         """Test the structure and content of created Excel file."""
-        create_sample_data()
-        
-        # Read the created Excel file
-        excel_path = 'data/purchase_price.xlsx'
+        create_sample_data(data_dir=self.data_dir)
         
         # Check Tabelle1 sheet
-        tabelle1_df = pd.read_excel(excel_path, sheet_name='Tabelle1')
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
         self.assertIn('Artnr', tabelle1_df.columns)
         self.assertIn('Fielmann EK', tabelle1_df.columns)
         self.assertIn('Other_Column', tabelle1_df.columns)
         self.assertEqual(len(tabelle1_df), 10)
         
         # Check Bestand Odoo sheet
-        bestand_df = pd.read_excel(excel_path, sheet_name='Bestand Odoo')
+        bestand_df = pd.read_excel(self.excel_path, sheet_name='Bestand Odoo')
         self.assertIn('Interne Referenz', bestand_df.columns)
         self.assertIn('Kosten', bestand_df.columns)
         self.assertIn('Other_Column', bestand_df.columns)
@@ -69,12 +61,10 @@ class TestCreateSampleData(unittest.TestCase):
 
     def test_create_sample_data_article_numbers(self):
         """Test that sample data contains expected article numbers."""
-        create_sample_data()
-        
-        excel_path = 'data/purchase_price.xlsx'
+        create_sample_data(data_dir=self.data_dir, reference=True)
         
         # Check Tabelle1 article numbers
-        tabelle1_df = pd.read_excel(excel_path, sheet_name='Tabelle1')
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
         expected_tabelle1_articles = [
             'ART001', 'ART002', 'ART003', 'ART004', 'ART005',
             'ART006', 'ART007', 'ART008', 'ART009', 'ART010'
@@ -82,7 +72,7 @@ class TestCreateSampleData(unittest.TestCase):
         self.assertEqual(list(tabelle1_df['Artnr']), expected_tabelle1_articles)
         
         # Check Bestand Odoo article numbers
-        bestand_df = pd.read_excel(excel_path, sheet_name='Bestand Odoo')
+        bestand_df = pd.read_excel(self.excel_path, sheet_name='Bestand Odoo')
         expected_bestand_articles = [
             'ART001', 'ART002', 'ART003', 'ART011', 'ART012',
             'ART013', 'ART014', 'ART015', 'ART016', 'ART017',
@@ -92,12 +82,10 @@ class TestCreateSampleData(unittest.TestCase):
 
     def test_create_sample_data_prices(self):
         """Test that sample data contains expected price values."""
-        create_sample_data()
-        
-        excel_path = 'data/purchase_price.xlsx'
+        create_sample_data(data_dir=self.data_dir, reference=True)
         
         # Check Tabelle1 prices
-        tabelle1_df = pd.read_excel(excel_path, sheet_name='Tabelle1')
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
         expected_tabelle1_prices = [
             15.50, 25.75, 35.00, 45.25, 55.50,
             65.75, 75.00, 85.25, 95.50, 105.75
@@ -105,7 +93,7 @@ class TestCreateSampleData(unittest.TestCase):
         self.assertEqual(list(tabelle1_df['Fielmann EK']), expected_tabelle1_prices)
         
         # Check Bestand Odoo prices
-        bestand_df = pd.read_excel(excel_path, sheet_name='Bestand Odoo')
+        bestand_df = pd.read_excel(self.excel_path, sheet_name='Bestand Odoo')
         expected_bestand_prices = [
             14.50, 24.75, 33.00, 50.25, 60.50,
             70.75, 80.00, 90.25, 100.50, 110.75,
@@ -115,12 +103,10 @@ class TestCreateSampleData(unittest.TestCase):
 
     def test_create_sample_data_common_articles(self):
         """Test that sample data has expected common articles."""
-        create_sample_data()
+        create_sample_data(data_dir=self.data_dir, reference=True)
         
-        excel_path = 'data/purchase_price.xlsx'
-        
-        tabelle1_df = pd.read_excel(excel_path, sheet_name='Tabelle1')
-        bestand_df = pd.read_excel(excel_path, sheet_name='Bestand Odoo')
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
+        bestand_df = pd.read_excel(self.excel_path, sheet_name='Bestand Odoo')
         
         # Find common articles
         tabelle1_articles = set(tabelle1_df['Artnr'])
@@ -134,56 +120,104 @@ class TestCreateSampleData(unittest.TestCase):
     def test_create_sample_data_directory_exists(self):
         """Test behavior when data directory already exists."""
         # Create data directory first
-        os.makedirs('data', exist_ok=True)
+        os.makedirs(self.data_dir, exist_ok=True)
         
         # Should still work without error
-        create_sample_data()
+        create_sample_data(data_dir=self.data_dir)
         
         # Check file was still created
-        self.assertTrue(os.path.exists('data/purchase_price.xlsx'))
+        self.assertTrue(os.path.exists(self.excel_path))
 
     @patch('builtins.print')
     def test_create_sample_data_output_messages(self, mock_print):
         """Test that create_sample_data prints expected messages."""
-        create_sample_data()
+        create_sample_data(data_dir=self.data_dir)
         
         # Check that all expected messages were printed
-        print_calls = [call[0][0] for call in mock_print.call_args_list]
+        all_output = '\n'.join(str(call) for call in mock_print.call_args_list)
         
         # Should print file creation message
-        file_creation_msg = any("Sample Excel file created" in str(call) for call in print_calls)
-        self.assertTrue(file_creation_msg)
+        self.assertIn("Sample Excel file created", all_output)
         
         # Should print statistics
-        tabelle1_msg = any("Tabelle1: 10 articles" in str(call) for call in print_calls)
-        self.assertTrue(tabelle1_msg)
+        self.assertIn("Tabelle1: 10 articles", all_output)
         
-        bestand_msg = any("Bestand Odoo: 13 articles" in str(call) for call in print_calls)
-        self.assertTrue(bestand_msg)
+        self.assertIn("Bestand Odoo: 13 articles", all_output)
         
-        common_msg = any("Common articles: 3" in str(call) for call in print_calls)
-        self.assertTrue(common_msg)
+        self.assertIn("Common articles: 3", all_output)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    @patch('builtins.print')
+    def test_create_sample_data_parquet_format(self, mock_print):
+        """Test that the parquet format writes one file per sheet and no workbook."""
+        create_sample_data(output_format='parquet', data_dir=self.data_dir, reference=True)
+        
+        self.assertFalse(os.path.exists(self.excel_path))
+        
+        tabelle1_df = pd.read_parquet(os.path.join(self.data_dir, 'purchase_price.parquet'))
+        bestand_df = pd.read_parquet(os.path.join(self.data_dir, 'purchase_price_bestand.parquet'))
+        self.assertEqual(len(tabelle1_df), 10)
+        self.assertEqual(len(bestand_df), 13)
+        self.assertEqual(tabelle1_df['Fielmann EK'].iloc[0], 15.50)
+        self.assertEqual(bestand_df['Interne Referenz'].iloc[-1], 'ART020')
+
+    @patch('builtins.print')
+    def test_create_sample_data_n_rows(self, mock_print):
+        """Test that n_rows scales the generated sheets with all columns intact."""
+        create_sample_data(n_rows=1000, data_dir=self.data_dir)
+        
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
+        bestand_df = pd.read_excel(self.excel_path, sheet_name='Bestand Odoo')
+        
+        self.assertEqual(list(tabelle1_df.columns), ['Artnr', 'Fielmann EK', 'Other_Column'])
+        self.assertEqual(list(bestand_df.columns), ['Interne Referenz', 'Kosten', 'Other_Column'])
+        self.assertEqual(len(tabelle1_df), 1000)
+        self.assertEqual(len(bestand_df), 1300)
+        self.assertFalse(tabelle1_df.isnull().any().any())
+        self.assertFalse(bestand_df.isnull().any().any())
+        self.assertTrue(tabelle1_df['Artnr'].is_unique)
+        
+        common = set(tabelle1_df['Artnr']).intersection(bestand_df['Interne Referenz'])
+        self.assertEqual(len(common), 300)
+
+    @patch('builtins.print')
+    def test_create_sample_data_default_is_generated(self, mock_print):
+        """Test that the default size is generated like any other, seeded and reproducible."""
+        create_sample_data(data_dir=self.data_dir, seed=1)
+        first = pd.read_excel(self.excel_path, sheet_name=None)
+        create_sample_data(data_dir=self.data_dir, seed=1)
+        second = pd.read_excel(self.excel_path, sheet_name=None)
+        create_sample_data(data_dir=self.data_dir, seed=2)
+        other_seed = pd.read_excel(self.excel_path, sheet_name=None)
+        
+        self.assertEqual(len(first['Tabelle1']), 10)
+        self.assertEqual(len(first['Bestand Odoo']), 13)
+        pd.testing.assert_frame_equal(first['Tabelle1'], second['Tabelle1'])
+        self.assertFalse(first['Tabelle1']['Fielmann EK'].equals(other_seed['Tabelle1']['Fielmann EK']))
+
+    def test_create_sample_data_invalid_format(self):
+        """Test that an unknown output format is rejected."""
+        with self.assertRaises(ValueError):
+            create_sample_data(output_format='csv', data_dir=self.data_dir)
 
     def test_create_sample_data_file_overwrite(self):
         """Test that create_sample_data overwrites existing file."""
         # Create initial file
-        os.makedirs('data', exist_ok=True)
+        os.makedirs(self.data_dir, exist_ok=True)
         initial_data = pd.DataFrame({'test': [1, 2, 3]})
-        initial_data.to_excel('data/purchase_price.xlsx', index=False)
+        initial_data.to_excel(self.excel_path, index=False)
         
         # Run create_sample_data
-        create_sample_data()
+        create_sample_data(data_dir=self.data_dir)
         
         # Check that file was overwritten with correct structure
-        excel_path = 'data/purchase_price.xlsx'
-        
         # Should have correct sheets now
-        with pd.ExcelFile(excel_path) as xls:
+        with pd.ExcelFile(self.excel_path) as xls:
             self.assertIn('Tabelle1', xls.sheet_names)
             self.assertIn('Bestand Odoo', xls.sheet_names)
         
         # Should not have the test column
-        tabelle1_df = pd.read_excel(excel_path, sheet_name='Tabelle1')
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
         self.assertNotIn('test', tabelle1_df.columns)
         self.assertIn('Artnr', tabelle1_df.columns)
 
@@ -193,32 +227,25 @@ class TestCreateSampleDataEdgeCases(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
-        self.original_cwd = os.getcwd()
-        self.temp_dir = tempfile.mkdtemp()
-        os.chdir(self.temp_dir)
+        self.temp_dir = make_temp_dir()
+        self.data_dir = os.path.join(self.temp_dir, 'data')
+        self.excel_path = os.path.join(self.data_dir, 'purchase_price.xlsx')
 
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
-    @patch('pandas.DataFrame.to_excel')
-    def test_create_sample_data_write_error(self, mock_to_excel):
+    @patch('xlsxwriter.Workbook.close')
+    def test_create_sample_data_write_error(self, mock_close):
         """Test behavior when Excel write fails."""
-        # Mock to_excel to raise an exception
-        mock_to_excel.side_effect = PermissionError("Cannot write file")
+        # Mock the workbook write to raise an exception
+        mock_close.side_effect = PermissionError("Cannot write file")
         
         with self.assertRaises(PermissionError):
-            create_sample_data()
+            create_sample_data(data_dir=self.data_dir)
 
     def test_create_sample_data_data_consistency(self):
         """Test that created data has consistent structure."""
-        create_sample_data()
-        
-        excel_path = 'data/purchase_price.xlsx'
+        create_sample_data(data_dir=self.data_dir)
         
-        tabelle1_df = pd.read_excel(excel_path, sheet_name='Tabelle1')
-        bestand_df = pd.read_excel(excel_path, sheet_name='Bestand Odoo')
+        tabelle1_df = pd.read_excel(self.excel_path, sheet_name='Tabelle1')
+        bestand_df = pd.read_excel(self.excel_path, sheet_name='Bestand Odoo')
         
         # Check data types
         self.assertTrue(pd.api.types.is_object_dtype(tabelle1_df['Artnr']))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the master_data_comparison module.
+"""
+
+import unittest
+import pandas as pd
+import numpy as np
+import io
+import os
+import contextlib
+from unittest.mock import patch
+
+import master_data_comparison
+from master_data_comparison import MasterDataComparison, _top_k, _write_csv
+from tests.helpers import write_workbook, setUpModule, tearDownModule, make_temp_dir
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def _seed_comparison(consolidated, master):
+    """Return a comparison with cleaned data from {article: price} dicts, downcast like clean_master_data."""
+    comparison = MasterDataComparison('consolidated.csv', 'master.xlsx')
+    comparison.consolidated_data = pd.DataFrame({
+        'article_number': pd.array(list(consolidated), dtype='string'),
+        'price': list(consolidated.values())
+    })
+    comparison.master_data = pd.DataFrame({
+        'article_number': pd.array(list(master), dtype='string'),
+        'master_price': list(master.values())
+    })
+    comparison._downcast_columns()
+    return comparison
+
+
+class TestMasterDataComparison(unittest.TestCase):
+    """Test cases for MasterDataComparison."""
+
+    def test_load_data_article_numbers_as_strings(self):
+        """Test that numeric article numbers in the CSV match the SKU digits of the master data."""
+        temp_dir = make_temp_dir()
+        csv_path = os.path.join(temp_dir, 'final_purchase_price.csv')
+        excel_path = os.path.join(temp_dir, 'master.xlsx')
+        pd.DataFrame({'article_number': [100, 200], 'price': [1.5, 2.5]}).to_csv(csv_path, index=False)
+        write_workbook(excel_path, {'Sheet1': pd.DataFrame({
+            'Product ID [sku]': ['Frames_100', 'Lenses_300'],
+            'Store Purchase Price [attribute6]': [1.5, 3.0]
+        })})
+
+        comparison = MasterDataComparison(csv_path, excel_path)
+        comparison.load_data()
+
+        self.assertEqual(comparison.consolidated_data['article_number'].dtype,
+                         master_data_comparison._ARTICLE_DTYPE)
+        comparison.clean_master_data()
+        results = comparison.compare_articles()
+        self.assertEqual(list(results['common_articles']), ['100'])
+        self.assertEqual(list(results['missing_in_master']), ['200'])
+
+    def test_downcast_columns(self):
+        """Test that both sides share one article categorical and prices stay float64."""
+        comparison = _seed_comparison({'1': 10.0, '2': 20.0}, {'2': 20.0, '3': 30.0})
+
+        self.assertEqual(comparison.consolidated_data['price'].dtype, np.float64)
+        self.assertEqual(comparison.master_data['master_price'].dtype, np.float64)
+        self.assertEqual(comparison.consolidated_data['article_number'].dtype,
+                         comparison.master_data['article_number'].dtype)
+        self.assertEqual(list(comparison.master_data['article_number'].cat.categories), ['1', '2', '3'])
+
+    def test_compare_articles(self):
+        """Test the common, missing and extra article sets."""
+        comparison = _seed_comparison(
+            {'100': 1.0, '200': 2.0, '300': 3.0},
+            {'200': 2.0, '300': 3.0, '400': 4.0}
+        )
+
+        results = comparison.compare_articles()
+
+        self.assertEqual(sorted(results['consolidated_articles']), ['100', '200', '300'])
+        self.assertEqual(sorted(results['master_articles']), ['200', '300', '400'])
+        self.assertEqual(sorted(results['common_articles']), ['200', '300'])
+        self.assertEqual(sorted(results['missing_in_master']), ['100'])
+        self.assertEqual(sorted(results['extra_in_master']), ['400'])
+
+    def test_analyze_price_discrepancies_cent_boundary(self):
+        """Test that a one-cent difference is not a discrepancy but two cents are, after downcasting."""
+        comparison = _seed_comparison(
+            {'1': 20.00, '2': 20.01, '3': 4096.02, '4': 4096.03, '5': 0.10, '6': 99999.99},
+            {'1': 19.99, '2': 19.99, '3': 4096.01, '4': 4096.01, '5': 0.09, '6': 99999.98}
+        )
+        results = comparison.compare_articles()
+
+        comparison_df = comparison.analyze_price_discrepancies(results['common_articles'])
+        by_article = comparison_df.set_index(comparison_df['article_number'].astype(str))
+
+        self.assertEqual(by_article['has_discrepancy'].to_dict(),
+                         {'1': False, '2': True, '3': False, '4': True, '5': False, '6': False})
+        self.assertEqual(by_article['price_difference'].to_dict(),
+                         {'1': 0.01, '2': 0.02, '3': 0.01, '4': 0.02, '5': 0.01, '6': 0.01})
+
+    def test_analyze_price_discrepancies_keeps_first_master_entry(self):
+        """Test that duplicate master entries are compared by their first price."""
+        comparison = MasterDataComparison('consolidated.csv', 'master.xlsx')
+        comparison.consolidated_data = pd.DataFrame({
+            'article_number': pd.array(['1'], dtype='string'), 'price': [10.0]
+        })
+        comparison.master_data = pd.DataFrame({
+            'article_number': pd.array(['1', '1'], dtype='string'), 'master_price': [10.0, 15.0]
+        })
+        comparison._downcast_columns()
+
+        comparison_df = comparison.analyze_price_discrepancies(comparison.compare_articles()['common_articles'])
+
+        self.assertEqual(len(comparison_df), 1)
+        self.assertFalse(comparison_df['has_discrepancy'].iloc[0])
+
+    def test_analyze_price_discrepancies_no_common_articles(self):
+        """Test that no common articles give an empty frame."""
+        comparison = _seed_comparison({'1': 1.0}, {'2': 2.0})
+
+        comparison_df = comparison.analyze_price_discrepancies(comparison.compare_articles()['common_articles'])
+
+        self.assertTrue(comparison_df.empty)
+
+    def test_generate_report_details(self):
+        """Test that the per-article listings follow the details flag."""
+        comparison = _seed_comparison({'1': 10.0, '2': 20.0, '3': 5.0}, {'1': 12.0, '2': 20.0})
+        results = comparison.compare_articles()
+        comparison_df = comparison.analyze_price_discrepancies(results['common_articles'])
+
+        reports = {}
+        for details in (True, False):
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                comparison.generate_report(results, comparison_df, details=details)
+            reports[details] = stdout.getvalue()
+
+        for details, report in reports.items():
+            self.assertIn('MASTER DATA COMPARISON REPORT', report)
+            self.assertIn('Articles with discrepancies: 1', report)
+        self.assertIn('Missing article numbers:', reports[True])
+        self.assertIn('TOP 10 PRICE DECREASES', reports[True])
+        self.assertIn('   • 1: €12.00 → €10.00 (-2.00, -16.7%)', reports[True])
+        self.assertNotIn('Missing article numbers:', reports[False])
+        self.assertNotIn('TOP 10 PRICE', reports[False])
+
+    def test_main_report_flag(self):
+        """Test that --report forces the per-article listings."""
+        log_path = os.path.join(make_temp_dir(), 'master_data_comparison.log')
+        steps = ['load_data', 'clean_master_data', 'generate_visualizations', 'save_detailed_results']
+        with contextlib.ExitStack() as stack:
+            for step in steps:
+                stack.enter_context(patch.object(MasterDataComparison, step))
+            stack.enter_context(patch.object(MasterDataComparison, 'compare_articles',
+                                             return_value={'common_articles': pd.Index([])}))
+            stack.enter_context(patch.object(MasterDataComparison, 'analyze_price_discrepancies',
+                                             return_value=pd.DataFrame()))
+            mock_report = stack.enter_context(patch.object(MasterDataComparison, 'generate_report'))
+
+            master_data_comparison.main(['--report'], log_path=log_path)
+            master_data_comparison.main([], log_path=log_path)
+
+        self.assertEqual([c.kwargs['details'] for c in mock_report.call_args_list], [True, None])
+        self.assertTrue(os.path.exists(log_path))
+        self.assertFalse(master_data_comparison.logger.handlers)
+
+
+class TestTopK(unittest.TestCase):
+    """Test cases for _top_k."""
+
+    def setUp(self):
+        """Set up a frame with ties, NaNs and a non-default index."""
+        self.df = pd.DataFrame({
+            'article_number': list('abcdefgh'),
+            'price_difference': [3.0, 1.0, 3.0, np.nan, 2.0, 3.0, 1.0, -4.0]
+        }, index=range(10, 18))
+
+    def test_top_k_matches_nlargest(self):
+        """Test that every k below the row count gives the rows and order of nlargest."""
+        for k in range(len(self.df)):
+            with self.subTest(k=k):
+                pd.testing.assert_frame_equal(_top_k(self.df, 'price_difference', k),
+                                              self.df.nlargest(k, 'price_difference'))
+
+    def test_top_k_matches_nsmallest(self):
+        """Test that every k below the row count gives the rows and order of nsmallest."""
+        for k in range(len(self.df)):
+            with self.subTest(k=k):
+                pd.testing.assert_frame_equal(_top_k(self.df, 'price_difference', k, largest=False),
+                                              self.df.nsmallest(k, 'price_difference'))
+
+    def test_top_k_all_rows(self):
+        """Test that k beyond the row count returns a stable sort with NaNs last.
+        
+        nlargest/nsmallest fall back to an unstable sort_values there.
+        """
+        for largest in (True, False):
+            with self.subTest(largest=largest):
+                expected = self.df.sort_values('price_difference', ascending=not largest, kind='stable')
+                pd.testing.assert_frame_equal(_top_k(self.df, 'price_difference', 20, largest), expected)
+
+    def test_top_k_ties_keep_row_order(self):
+        """Test that tied values keep their original row order."""
+        result = _top_k(self.df, 'price_difference', 2)
+
+        self.assertEqual(list(result['article_number']), ['a', 'c'])
+
+
+class TestWriteCsv(unittest.TestCase):
+    """Test cases for _write_csv."""
+
+    def setUp(self):
+        """Set up a frame with the column types of the comparison results."""
+        self.temp_dir = make_temp_dir()
+        self.df = pd.DataFrame({
+            'article_number': pd.Categorical(['100', '200', '300']),
+            'consolidated_price': [10.5, 20.0, 0.1],
+            'master_price': [10.5, 19.99, 0.09],
+            'price_difference': [0.0, 0.01, 0.01],
+            'has_discrepancy': [False, False, True],
+            'note': ['plain', 'with, comma', 'with "quote"']
+        }, index=[7, 8, 9])
+
+    def _read_back(self, path):
+        """Read a written CSV back with article numbers as strings."""
+        return pd.read_csv(path, dtype={'article_number': str})
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_write_csv_matches_to_csv(self):
+        """Test that the Arrow writer reads back like DataFrame.to_csv output."""
+        arrow_path = os.path.join(self.temp_dir, 'arrow.csv')
+        pandas_path = os.path.join(self.temp_dir, 'pandas.csv')
+
+        _write_csv(self.df, arrow_path)
+        self.df.to_csv(pandas_path, index=False)
+
+        pd.testing.assert_frame_equal(self._read_back(arrow_path), self._read_back(pandas_path))
+
+    def test_write_csv_without_pyarrow(self):
+        """Test that the fallback writes exactly what DataFrame.to_csv writes."""
+        path = os.path.join(self.temp_dir, 'fallback.csv')
+
+        with patch.object(master_data_comparison, 'pa_csv', None):
+            _write_csv(self.df, path)
+
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.df.to_csv(index=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
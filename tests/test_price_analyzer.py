@@ -6,51 +6,79 @@ Unit tests for the PriceAnalyzer class.
 import unittest
 import pandas as pd
 import numpy as np
-import tempfile
 import os
 import shutil
-from pathlib import Path
 from unittest.mock import patch, MagicMock
-import sys
-
-# Add src directory to path for imports
-sys.path.append(str(Path(__file__).parent.parent / "src"))
 
+import price_analyzer
 from price_analyzer import PriceAnalyzer
+from tests.helpers import slow, write_workbook, setUpModule, tearDownModule, make_temp_dir
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import numba  # noqa: F401
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Empty cleaned sheet; tests assign copies of it
+_EMPTY_ARTICLE_PRICE = pd.DataFrame({
+    'article_number': pd.array([], dtype='string'),
+    'price': pd.array([], dtype='float64')
+})
 
 
 class TestPriceAnalyzer(unittest.TestCase):
     """Test cases for PriceAnalyzer class."""
 
-    def setUp(self):
-        """Set up test fixtures before each test method."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.excel_path = os.path.join(self.temp_dir, "test_data.xlsx")
-        
-        # Create test data
-        self.tabelle1_data = pd.DataFrame({
+    @classmethod
+    def setUpClass(cls):
+        """Write the test workbook once; each test works on its own copy."""
+        # Create test data (as strings, like the cells read from the workbook)
+        cls.tabelle1_data = pd.DataFrame({
             'Artnr': ['ART001', 'ART002', 'ART003', 'ART004', 'ART005'],
             'Fielmann EK': ['15.50€', '25,75', '35.00', '45.25', 'invalid']
-        })
+        }, dtype='string')
         
-        self.bestand_data = pd.DataFrame({
+        cls.bestand_data = pd.DataFrame({
             'Interne Referenz': ['ART001', 'ART002', 'ART006', 'ART007', 'ART008'],
             'Kosten': ['14.50', '24,75€', '65.75', '75.00', '']
-        })
+        }, dtype='string')
         
         # Create test Excel file
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-            self.tabelle1_data.to_excel(writer, sheet_name='Tabelle1', index=False)
-            self.bestand_data.to_excel(writer, sheet_name='Bestand Odoo', index=False)
+        cls._template_xlsx = os.path.join(make_temp_dir(), 'template.xlsx')
+        write_workbook(cls._template_xlsx, {'Tabelle1': cls.tabelle1_data, 'Bestand Odoo': cls.bestand_data})
+        
+        # Cleaned sheets for the tests that start after clean_data
+        analyzer = PriceAnalyzer(cls._template_xlsx)
+        analyzer.tabelle1_data = cls.tabelle1_data.copy()
+        analyzer.bestand_data = cls.bestand_data.copy()
+        analyzer.clean_data()
+        cls._tabelle1_clean = analyzer.tabelle1_data
+        cls._bestand_clean = analyzer.bestand_data
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.temp_dir = make_temp_dir()
+        self.excel_path = os.path.join(self.temp_dir, "test_data.xlsx")
+        shutil.copyfile(self._template_xlsx, self.excel_path)
         
         self.analyzer = PriceAnalyzer(self.excel_path)
 
-    def tearDown(self):
-        """Clean up after each test method."""
-        # Remove temporary files
-        if os.path.exists(self.excel_path):
-            os.remove(self.excel_path)
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    def _seed_analyzer(self, analyzer):
+        """Give the analyzer the raw sheet data without reading the workbook."""
+        analyzer.tabelle1_data = self.tabelle1_data.copy()
+        analyzer.bestand_data = self.bestand_data.copy()
+
+    def _seed_clean_analyzer(self, analyzer):
+        """Give the analyzer the sheet data as clean_data leaves it."""
+        analyzer.tabelle1_data = self._tabelle1_clean.copy()
+        analyzer.bestand_data = self._bestand_clean.copy()
 
     def test_init(self):
         """Test PriceAnalyzer initialization."""
@@ -78,6 +106,40 @@ class TestPriceAnalyzer(unittest.TestCase):
         self.assertIn('Interne Referenz', bestand.columns)
         self.assertIn('Kosten', bestand.columns)
 
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_load_data_parquet(self):
+        """Test loading both sheets from Parquet files."""
+        parquet_path = os.path.join(self.temp_dir, "test_data.parquet")
+        self.tabelle1_data.to_parquet(parquet_path, index=False)
+        self.bestand_data.to_parquet(
+            os.path.join(self.temp_dir, "test_data_bestand.parquet"), index=False
+        )
+        
+        analyzer = PriceAnalyzer(parquet_path)
+        tabelle1, bestand = analyzer.load_data()
+        
+        self.assertEqual(len(tabelle1), 5)
+        self.assertEqual(len(bestand), 5)
+        self.assertEqual(list(tabelle1.columns), ['Artnr', 'Fielmann EK'])
+        self.assertEqual(list(bestand.columns), ['Interne Referenz', 'Kosten'])
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_load_data_parquet_cache(self):
+        """Test that a second load is served from the Parquet cache."""
+        tabelle1, bestand = PriceAnalyzer(self.excel_path, parquet_cache=True).load_data()
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "test_data.cache.parquet")))
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "test_data_bestand.cache.parquet")))
+        
+        with patch('pandas.read_excel') as mock_read_excel:
+            cached_tabelle1, cached_bestand = PriceAnalyzer(
+                self.excel_path, parquet_cache=True
+            ).load_data()
+        
+        mock_read_excel.assert_not_called()
+        # Missing cells come back as None rather than NaN; compare as strings
+        pd.testing.assert_frame_equal(cached_tabelle1.astype('string'), tabelle1.astype('string'))
+        pd.testing.assert_frame_equal(cached_bestand.astype('string'), bestand.astype('string'))
+
     def test_load_data_file_not_found(self):
         """Test loading data when file doesn't exist."""
         analyzer = PriceAnalyzer("nonexistent_file.xlsx")
@@ -95,13 +157,11 @@ class TestPriceAnalyzer(unittest.TestCase):
         
         with self.assertRaises(Exception):
             analyzer.load_data()
-        
-        os.remove(test_path)
 
     def test_clean_data(self):
         """Test data cleaning functionality."""
         # Load data first
-        self.analyzer.load_data()
+        self._seed_analyzer(self.analyzer)
         
         # Clean data
         self.analyzer.clean_data()
@@ -128,25 +188,82 @@ class TestPriceAnalyzer(unittest.TestCase):
     def test_clean_data_price_conversion(self):
         """Test specific price conversion scenarios."""
         # Load and clean data
-        self.analyzer.load_data()
+        self._seed_analyzer(self.analyzer)
         self.analyzer.clean_data()
         
         # Check specific price conversions
-        tabelle1 = self.analyzer.tabelle1_data
-        bestand = self.analyzer.bestand_data
+        tabelle1_prices = self.analyzer.tabelle1_data.set_index('article_number')['price'].to_dict()
         
         # Verify Euro symbol removal and comma to dot conversion
-        art001_tabelle1 = tabelle1[tabelle1['article_number'] == 'ART001']['price'].iloc[0]
-        self.assertEqual(art001_tabelle1, 15.50)
-        
-        art002_tabelle1 = tabelle1[tabelle1['article_number'] == 'ART002']['price'].iloc[0]
-        self.assertEqual(art002_tabelle1, 25.75)
+        self.assertEqual(tabelle1_prices['ART001'], 15.50)
+        self.assertEqual(tabelle1_prices['ART002'], 25.75)
+
+    def test_clean_data_duplicates_keep_lowest_price_in_article_order(self):
+        """Test that Tabelle1 keeps the first lowest price per article, ordered by article number."""
+        self.analyzer.tabelle1_data = pd.DataFrame({
+            'Artnr': ['ART003', 'ART001', 'ART003', 'ART002', 'ART001', 'ART003'],
+            'Fielmann EK': ['30.00', '12.00', '28.00', '20.00', '10.00', '28.00']
+        }, dtype='string')
+        self.analyzer.bestand_data = self.bestand_data.copy()
+
+        self.analyzer.clean_data()
+
+        tabelle1 = self.analyzer.tabelle1_data
+        self.assertEqual(list(tabelle1['article_number']), ['ART001', 'ART002', 'ART003'])
+        self.assertEqual(list(tabelle1['price']), [10.0, 20.0, 28.0])
+        self.assertEqual(self.analyzer.duplicates_removed['tabelle1'], 3)
+
+    @unittest.skipUnless(HAS_PYARROW and HAS_NUMBA, "pyarrow/numba not installed")
+    def test_clean_article_numbers_numba_matches_regex(self):
+        """Test that the numba sanitizer gives the same result as the regex path."""
+        values = pd.Series(
+            [' ART-001 ', 'ART 002', 'ART#003/x', None, '  ', 'art_004'] * 3,
+            dtype='string'
+        ).iloc[2:]
+        
+        with patch.object(price_analyzer, '_ARROW_MIN_ROWS', 0):
+            with patch.object(price_analyzer, '_NUMBA_MIN_ROWS', 10**9):
+                expected = price_analyzer._clean_article_numbers(values)
+            with patch.object(price_analyzer, '_NUMBA_MIN_ROWS', 0):
+                result = price_analyzer._clean_article_numbers(values)
+        
+        pd.testing.assert_series_equal(result, expected)
+        self.assertEqual(result.iloc[0], 'ART003x')
+        self.assertTrue(pd.isna(result.iloc[1]))
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_clean_columns_arrow_matches_pandas(self):
+        """Test that small and large columns are cleaned the same way."""
+        articles = pd.Series([' ART-001 ', 'ART 002', 'Ärt#003', None, '  '], dtype='string')
+        prices = pd.Series(['15.50€', '25,75', '1,234.50', '', np.nan,
+                            '1\xa0234,50 €', '2\u2009345,5\u202f€'], dtype=object)
+        
+        with patch.object(price_analyzer, '_ARROW_MIN_ROWS', 10**9):
+            expected_articles = price_analyzer._clean_article_numbers(articles)
+            expected_prices = price_analyzer._clean_prices(prices)
+        with patch.object(price_analyzer, '_ARROW_MIN_ROWS', 0):
+            result_articles = price_analyzer._clean_article_numbers(articles)
+            result_prices = price_analyzer._clean_prices(prices)
+        
+        pd.testing.assert_series_equal(result_articles, expected_articles)
+        pd.testing.assert_series_equal(result_prices, expected_prices)
+        self.assertEqual(list(result_prices[:3]), [15.50, 25.75, 1234.50])
+        self.assertEqual(list(result_prices[5:]), [1234.50, 2345.50])
+
+    def test_clean_prices_mixed_object_column(self):
+        """Test that numeric cells mixed with text cells are cleaned like text."""
+        prices = pd.Series([15.5, 20, '25,75 €', None, 'n/a'], dtype=object, index=range(3, 8))
+
+        result = price_analyzer._clean_prices(prices)
+        expected = price_analyzer._clean_prices(prices.astype('string'))
+
+        pd.testing.assert_series_equal(result, expected)
+        self.assertEqual(list(result[:3]), [15.5, 20.0, 25.75])
 
     def test_analyze_common_articles(self):
         """Test analysis of common articles."""
         # Prepare data
-        self.analyzer.load_data()
-        self.analyzer.clean_data()
+        self._seed_clean_analyzer(self.analyzer)
         
         # Analyze common articles
         analysis = self.analyzer.analyze_common_articles()
@@ -169,8 +286,8 @@ class TestPriceAnalyzer(unittest.TestCase):
     def test_analyze_common_articles_empty_data(self):
         """Test common articles analysis with empty data."""
         # Create analyzer with empty data
-        self.analyzer.tabelle1_data = pd.DataFrame(columns=['article_number', 'price'])
-        self.analyzer.bestand_data = pd.DataFrame(columns=['article_number', 'price'])
+        self.analyzer.tabelle1_data = _EMPTY_ARTICLE_PRICE.copy()
+        self.analyzer.bestand_data = _EMPTY_ARTICLE_PRICE.copy()
         
         analysis = self.analyzer.analyze_common_articles()
         
@@ -181,8 +298,7 @@ class TestPriceAnalyzer(unittest.TestCase):
     def test_analyze_price_differences(self):
         """Test price difference analysis."""
         # Prepare data
-        self.analyzer.load_data()
-        self.analyzer.clean_data()
+        self._seed_clean_analyzer(self.analyzer)
         
         # Analyze price differences
         price_comparison = self.analyzer.analyze_price_differences()
@@ -200,7 +316,7 @@ class TestPriceAnalyzer(unittest.TestCase):
         self.assertEqual(len(price_comparison), 2)  # ART001 and ART002
         
         # Check specific calculations
-        art001_row = price_comparison[price_comparison['article_number'] == 'ART001'].iloc[0]
+        art001_row = price_comparison.set_index('article_number').to_dict('index')['ART001']
         self.assertEqual(art001_row['tabelle1_price'], 15.50)
         self.assertEqual(art001_row['bestand_price'], 14.50)
         self.assertEqual(art001_row['price_difference'], 1.00)
@@ -222,11 +338,30 @@ class TestPriceAnalyzer(unittest.TestCase):
         # Should return empty DataFrame
         self.assertTrue(price_comparison.empty)
 
+    def test_analyze_price_differences_large_prices(self):
+        """Test that cleaned prices stay float64, so large prices keep exact differences."""
+        self.analyzer.tabelle1_data = pd.DataFrame({
+            'Artnr': ['ART001', 'ART002'],
+            'Fielmann EK': ['5000,01 €', '12345.67']
+        })
+        self.analyzer.bestand_data = pd.DataFrame({
+            'Interne Referenz': ['ART001', 'ART002'],
+            'Kosten': ['5000,00 €', '12345.66']
+        })
+        self.analyzer.clean_data()
+
+        price_comparison = self.analyzer.analyze_price_differences().set_index('article_number')
+
+        self.assertEqual(self.analyzer.tabelle1_data['price'].dtype, np.float64)
+        self.assertEqual(self.analyzer.bestand_data['price'].dtype, np.float64)
+        self.assertEqual(price_comparison['price_difference'].to_dict(),
+                         {'ART001': 5000.01 - 5000.00, 'ART002': 12345.67 - 12345.66})
+        self.assertAlmostEqual(price_comparison.loc['ART001', 'price_difference_pct'], 0.0002, places=9)
+
     def test_merge_data(self):
         """Test data merging functionality."""
         # Prepare data
-        self.analyzer.load_data()
-        self.analyzer.clean_data()
+        self._seed_clean_analyzer(self.analyzer)
         
         # Merge data
         merged_data = self.analyzer.merge_data()
@@ -245,20 +380,15 @@ class TestPriceAnalyzer(unittest.TestCase):
         self.assertEqual(actual_articles, expected_articles)
         
         # Check source assignments
-        art001_source = merged_data[merged_data['article_number'] == 'ART001']['source'].iloc[0]
-        self.assertEqual(art001_source, 'Both (Tabelle1 priority)')
-        
-        art003_source = merged_data[merged_data['article_number'] == 'ART003']['source'].iloc[0]
-        self.assertEqual(art003_source, 'Tabelle1')
-        
-        art006_source = merged_data[merged_data['article_number'] == 'ART006']['source'].iloc[0]
-        self.assertEqual(art006_source, 'Bestand Odoo')
+        sources = merged_data.set_index('article_number')['source'].to_dict()
+        self.assertEqual(sources['ART001'], 'Both (Tabelle1 priority)')
+        self.assertEqual(sources['ART003'], 'Tabelle1')
+        self.assertEqual(sources['ART006'], 'Bestand Odoo')
 
     def test_save_results(self):
         """Test saving results to CSV."""
         # Prepare data
-        self.analyzer.load_data()
-        self.analyzer.clean_data()
+        self._seed_clean_analyzer(self.analyzer)
         self.analyzer.merge_data()
         
         # Save results
@@ -268,12 +398,27 @@ class TestPriceAnalyzer(unittest.TestCase):
         # Check file was created
         self.assertTrue(os.path.exists(output_path))
         
-        # Check file contents
+        # Check file contents: the header plus one line per merged row
+        # (the Arrow writer quotes the header names)
+        with open(output_path, 'rb') as f:
+            header = f.readline().decode().strip().replace('"', '').split(',')
+            n_lines = sum(1 for _ in f)
+        self.assertEqual(header, ['article_number', 'price', 'source'])
+        self.assertEqual(n_lines, len(self.analyzer.merged_data))
+
+    def test_save_results_gzip(self):
+        """Test saving results to a gzip-compressed CSV."""
+        self._seed_clean_analyzer(self.analyzer)
+        self.analyzer.merge_data()
+        
+        output_path = os.path.join(self.temp_dir, "test_output.csv.gz")
+        self.analyzer.save_results(output_path)
+        
+        with open(output_path, 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
         saved_data = pd.read_csv(output_path)
         self.assertEqual(len(saved_data), len(self.analyzer.merged_data))
-        
-        # Clean up
-        os.remove(output_path)
+        self.assertEqual(list(saved_data.columns), ['article_number', 'price', 'source'])
 
     def test_save_results_no_merged_data(self):
         """Test saving results when no merged data exists."""
@@ -288,12 +433,15 @@ class TestPriceAnalyzer(unittest.TestCase):
     def test_save_results_invalid_path(self):
         """Test saving results to invalid path."""
         # Prepare data
-        self.analyzer.load_data()
-        self.analyzer.clean_data()
+        self._seed_clean_analyzer(self.analyzer)
         self.analyzer.merge_data()
         
-        # Try to save to invalid path
-        invalid_path = "/nonexistent_directory/output.csv"
+        # Try to save below a regular file, which cannot be a directory
+        # (unlike a missing directory, this also fails when running as root)
+        blocking_file = os.path.join(self.temp_dir, "not_a_directory")
+        with open(blocking_file, 'w'):
+            pass
+        invalid_path = os.path.join(blocking_file, "output.csv")
         
         with self.assertRaises(Exception):
             self.analyzer.save_results(invalid_path)
@@ -301,14 +449,15 @@ class TestPriceAnalyzer(unittest.TestCase):
     @patch('builtins.print')
     def test_generate_analytics_report(self, mock_print):
         """Test analytics report generation."""
-        # Prepare data
-        self.analyzer.load_data()
+        # Prepare data (duplicates are analyzed before cleaning, as in main)
+        self._seed_analyzer(self.analyzer)
+        duplicate_analysis = self.analyzer.analyze_duplicates_within_sheets()
         self.analyzer.clean_data()
         price_comparison = self.analyzer.analyze_price_differences()
         self.analyzer.merge_data()
         
         # Generate report
-        self.analyzer.generate_analytics_report(price_comparison)
+        self.analyzer.generate_analytics_report(price_comparison, duplicate_analysis)
         
         # Check that print was called (report was generated)
         self.assertTrue(mock_print.called)
@@ -338,9 +487,12 @@ class TestPriceAnalyzer(unittest.TestCase):
             self.analyzer.bestand_data.copy()
         ], ignore_index=True)
         
-        # Generate report with empty comparison
+        # Generate report with empty comparison and no duplicates
         empty_comparison = pd.DataFrame()
-        self.analyzer.generate_analytics_report(empty_comparison)
+        no_duplicates = {'total_duplicates': 0, 'duplicates_with_price_diff': 0, 'details': []}
+        self.analyzer.generate_analytics_report(
+            empty_comparison, {'tabelle1': no_duplicates, 'bestand_odoo': no_duplicates}
+        )
         
         # Should still generate report without price analysis section
         self.assertTrue(mock_print.called)
@@ -349,36 +501,34 @@ class TestPriceAnalyzer(unittest.TestCase):
 class TestPriceAnalyzerIntegration(unittest.TestCase):
     """Integration tests for PriceAnalyzer."""
 
-    def setUp(self):
-        """Set up integration test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.excel_path = os.path.join(self.temp_dir, "integration_test.xlsx")
-        
+    @classmethod
+    def setUpClass(cls):
+        """Write the integration test workbook once."""
         # Create realistic test data
         tabelle1_data = pd.DataFrame({
             'Artnr': ['FRAME001', 'LENS002', 'FRAME003', 'LENS004', 'FRAME005'],
             'Fielmann EK': ['125.50€', '89,75', '156.00', '67.25', '198.80'],
             'Description': ['Frame A', 'Lens B', 'Frame C', 'Lens D', 'Frame E']
-        })
+        }, dtype='string')
         
         bestand_data = pd.DataFrame({
             'Interne Referenz': ['FRAME001', 'LENS002', 'CASE006', 'CLEAN007', 'FRAME008'],
             'Kosten': ['120.00', '85,50€', '25.75', '15.00', '175.25'],
             'Category': ['Frame', 'Lens', 'Case', 'Cleaner', 'Frame']
-        })
+        }, dtype='string')
         
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-            tabelle1_data.to_excel(writer, sheet_name='Tabelle1', index=False)
-            bestand_data.to_excel(writer, sheet_name='Bestand Odoo', index=False)
+        cls._template_xlsx = os.path.join(make_temp_dir(), 'template.xlsx')
+        write_workbook(cls._template_xlsx, {'Tabelle1': tabelle1_data, 'Bestand Odoo': bestand_data})
+
+    def setUp(self):
+        """Set up integration test fixtures."""
+        self.temp_dir = make_temp_dir()
+        self.excel_path = os.path.join(self.temp_dir, "integration_test.xlsx")
+        shutil.copyfile(self._template_xlsx, self.excel_path)
         
         self.analyzer = PriceAnalyzer(self.excel_path)
 
-    def tearDown(self):
-        """Clean up integration test fixtures."""
-        if os.path.exists(self.excel_path):
-            os.remove(self.excel_path)
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
+    @slow
     def test_full_analysis_workflow(self):
         """Test complete analysis workflow."""
         # Run full workflow
@@ -392,12 +542,10 @@ class TestPriceAnalyzerIntegration(unittest.TestCase):
         # Verify results
         self.assertEqual(common_analysis['common_articles_count'], 2)  # FRAME001, LENS002
         self.assertEqual(len(price_comparison), 2)
-        self.assertEqual(len(merged_data), 7)  # All unique articles
+        self.assertEqual(len(merged_data), 8)  # All unique articles: 5 + 5 - 2 common
         
         # Check price differences are calculated correctly
-        frame001_comparison = price_comparison[
-            price_comparison['article_number'] == 'FRAME001'
-        ].iloc[0]
+        frame001_comparison = price_comparison.set_index('article_number').to_dict('index')['FRAME001']
         self.assertAlmostEqual(frame001_comparison['price_difference'], 5.50, places=2)
 
 
@@ -4,51 +4,28 @@ Integration tests for the run_analysis.py script.
 """
 
 import unittest
-import tempfile
 import os
 import shutil
 import sys
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 import pandas as pd
-import subprocess
-
-# Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.append(str(project_root))
-sys.path.append(str(project_root / "src"))
+import runpy
+import io
+import contextlib
 
 import run_analysis
 from src.create_sample_data import create_sample_data
 from src.price_analyzer import PriceAnalyzer
+from tests.helpers import slow, write_workbook, setUpModule, tearDownModule, make_temp_dir
 
 
 class TestRunAnalysisScript(unittest.TestCase):
     """Test cases for the run_analysis.py script."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.original_cwd = os.getcwd()
-        self.temp_dir = tempfile.mkdtemp()
-        os.chdir(self.temp_dir)
-        
-        # Create test Excel data
-        self.create_test_excel_file()
-
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        # Clean up temp directory
-        self._cleanup_temp_dir()
-
-    def _cleanup_temp_dir(self):
-        """Helper method to clean up temp directory."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
-    def create_test_excel_file(self):
-        """Create a test Excel file for testing."""
-        os.makedirs('data', exist_ok=True)
-        
+    @classmethod
+    def setUpClass(cls):
+        """Write the test Excel file once for all tests."""
         tabelle1_data = pd.DataFrame({
             'Artnr': ['TEST001', 'TEST002', 'TEST003'],
             'Fielmann EK': [10.50, 20.75, 30.00],
@@ -61,89 +38,108 @@ class TestRunAnalysisScript(unittest.TestCase):
             'Other_Column': ['X', 'Y', 'Z']
         })
         
-        with pd.ExcelWriter('data/purchase_price.xlsx', engine='openpyxl') as writer:
-            tabelle1_data.to_excel(writer, sheet_name='Tabelle1', index=False)
-            bestand_data.to_excel(writer, sheet_name='Bestand Odoo', index=False)
+        cls._template_xlsx = os.path.join(make_temp_dir(), 'template.xlsx')
+        write_workbook(cls._template_xlsx, {'Tabelle1': tabelle1_data, 'Bestand Odoo': bestand_data})
+        
+        # Sample workbook for the tests where run_analysis has to create one
+        sample_dir = make_temp_dir()
+        with patch('builtins.print'):
+            create_sample_data(data_dir=sample_dir, reference=True)
+        cls._sample_xlsx = os.path.join(sample_dir, 'purchase_price.xlsx')
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = make_temp_dir()
+        self.data_dir = os.path.join(self.temp_dir, 'data')
+        self.excel_path = os.path.join(self.data_dir, 'purchase_price.xlsx')
+        self.output_path = os.path.join(self.data_dir, 'final_purchase_price.csv')
+        self.log_path = os.path.join(self.temp_dir, 'price_analysis.log')
+        
+        # Create test Excel data
+        self.create_test_excel_file()
+
+    def create_test_excel_file(self):
+        """Copy the test Excel file into the test's data directory."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        shutil.copyfile(self._template_xlsx, self.excel_path)
 
-    @patch('builtins.print')
-    def test_run_analysis_with_existing_file(self, mock_print):
+    def _copy_sample_data(self, data_dir='data', **kwargs):
+        """Stand-in for create_sample_data that copies the cached sample workbook."""
+        os.makedirs(data_dir, exist_ok=True)
+        shutil.copyfile(self._sample_xlsx, os.path.join(data_dir, 'purchase_price.xlsx'))
+
+    def test_run_analysis_with_existing_file(self):
         """Test run_analysis when Excel file already exists."""
         # Run the main function
-        run_analysis.main()
+        with self.assertLogs('run_analysis', level='INFO') as logs:
+            run_analysis.main(self.data_dir, self.log_path)
         
         # Check that analysis completed successfully
-        print_calls = [str(call) for call in mock_print.call_args_list]
+        all_output = '\n'.join(logs.output)
         
-        # Should print starting message
-        starting_msg = any("Starting Purchase Price Analysis" in call for call in print_calls)
-        self.assertTrue(starting_msg)
+        # Should log starting message
+        self.assertIn("Starting Purchase Price Analysis", all_output)
         
-        # Should print completion message
-        completion_msg = any("Analysis completed successfully" in call for call in print_calls)
-        self.assertTrue(completion_msg)
+        # Should log completion message
+        self.assertIn("Analysis completed successfully", all_output)
         
         # Check that output file was created
-        self.assertTrue(os.path.exists('data/final_purchase_price.csv'))
+        self.assertTrue(os.path.exists(self.output_path))
 
-    @patch('builtins.print')
-    def test_run_analysis_without_excel_file(self, mock_print):
+    def test_run_analysis_without_excel_file(self):
         """Test run_analysis when Excel file doesn't exist."""
         # Remove the Excel file
-        os.remove('data/purchase_price.xlsx')
+        os.remove(self.excel_path)
         
-        # Run the main function
-        run_analysis.main()
+        # Run the main function (sample data comes from the cached workbook)
+        with patch('create_sample_data.create_sample_data', side_effect=self._copy_sample_data), \
+                self.assertLogs('run_analysis', level='INFO') as logs:
+            run_analysis.main(self.data_dir, self.log_path)
         
-        print_calls = [str(call) for call in mock_print.call_args_list]
+        all_output = '\n'.join(logs.output)
         
-        # Should print file not found message
-        not_found_msg = any("Excel file not found" in call for call in print_calls)
-        self.assertTrue(not_found_msg)
+        # Should log file not found message
+        self.assertIn("Excel file not found", all_output)
         
-        # Should print creating sample data message
-        sample_msg = any("Creating sample data" in call for call in print_calls)
-        self.assertTrue(sample_msg)
+        # Should log creating sample data message
+        self.assertIn("Creating sample data", all_output)
         
         # Should create sample data and complete analysis
-        completion_msg = any("Analysis completed successfully" in call for call in print_calls)
-        self.assertTrue(completion_msg)
+        self.assertIn("Analysis completed successfully", all_output)
         
         # Check that Excel file was created
-        self.assertTrue(os.path.exists('data/purchase_price.xlsx'))
+        self.assertTrue(os.path.exists(self.excel_path))
         
         # Check that output file was created
-        self.assertTrue(os.path.exists('data/final_purchase_price.csv'))
+        self.assertTrue(os.path.exists(self.output_path))
 
-    @patch('src.price_analyzer.main')
-    @patch('builtins.print')
-    def test_run_analysis_handles_analysis_failure(self, mock_print, mock_main):
+    @patch('price_analyzer.main')
+    def test_run_analysis_handles_analysis_failure(self, mock_main):
         """Test run_analysis handles analysis failures gracefully."""
         # Mock main to raise an exception
         mock_main.side_effect = Exception("Analysis failed")
         
         # Run should handle the exception
-        with self.assertRaises(SystemExit) as cm:
-            run_analysis.main()
+        with self.assertRaises(SystemExit) as cm, \
+                self.assertLogs('run_analysis', level='INFO') as logs:
+            run_analysis.main(self.data_dir, self.log_path)
         
         # Should exit with code 1
         self.assertEqual(cm.exception.code, 1)
         
-        print_calls = [str(call) for call in mock_print.call_args_list]
-        
-        # Should print failure message
-        failure_msg = any("Analysis failed" in call for call in print_calls)
-        self.assertTrue(failure_msg)
+        # Should log failure message
+        self.assertIn("Analysis failed", '\n'.join(logs.output))
 
     def test_run_analysis_creates_log_file(self):
         """Test that run_analysis creates a log file."""
         # Run the analysis
-        run_analysis.main()
+        run_analysis.main(self.data_dir, self.log_path)
         
         # Check that log file was created
-        self.assertTrue(os.path.exists('price_analysis.log'))
+        self.assertTrue(os.path.exists(self.log_path))
         
         # Check log file has content
-        with open('price_analysis.log', 'r') as f:
+        with open(self.log_path, 'r') as f:
             log_content = f.read()
             self.assertIn('Loading data', log_content)
             self.assertIn('Analysis completed', log_content)
@@ -151,10 +147,10 @@ class TestRunAnalysisScript(unittest.TestCase):
     def test_run_analysis_output_file_structure(self):
         """Test the structure of the output CSV file."""
         # Run the analysis
-        run_analysis.main()
+        run_analysis.main(self.data_dir, self.log_path)
         
         # Check output file structure
-        output_df = pd.read_csv('data/final_purchase_price.csv')
+        output_df = pd.read_csv(self.output_path)
         
         # Check required columns
         expected_columns = ['article_number', 'price', 'source']
@@ -165,22 +161,21 @@ class TestRunAnalysisScript(unittest.TestCase):
         self.assertGreater(len(output_df), 0)
         
         # Check source values are valid
-        valid_sources = ['Tabelle1', 'Bestand Odoo', 'Both (Tabelle1 priority)']
-        self.assertTrue(all(source in valid_sources for source in output_df['source'].unique()))
+        valid_sources = {'Tabelle1', 'Bestand Odoo', 'Both (Tabelle1 priority)'}
+        self.assertLessEqual(set(output_df['source'].unique()), valid_sources)
 
-    @patch('src.create_sample_data.create_sample_data')
-    @patch('builtins.print')
-    def test_run_analysis_sample_data_creation_failure(self, mock_print, mock_create_sample):
+    @patch('create_sample_data.create_sample_data')
+    def test_run_analysis_sample_data_creation_failure(self, mock_create_sample):
         """Test handling of sample data creation failure."""
         # Remove Excel file
-        os.remove('data/purchase_price.xlsx')
+        os.remove(self.excel_path)
         
         # Mock sample data creation to fail
         mock_create_sample.side_effect = Exception("Failed to create sample data")
         
         # Should raise the exception
         with self.assertRaises(Exception):
-            run_analysis.main()
+            run_analysis.main(self.data_dir, self.log_path)
 
     def test_sys_path_modification(self):
         """Test that sys.path is correctly modified."""
@@ -195,39 +190,27 @@ class TestRunAnalysisScript(unittest.TestCase):
         self.assertTrue(any("src" in path for path in sys.path))
 
 
+@slow
 class TestRunAnalysisCommandLine(unittest.TestCase):
     """Test command line execution of run_analysis.py."""
 
     def setUp(self):
         """Set up test fixtures."""
-        self.original_cwd = os.getcwd()
-        self.temp_dir = tempfile.mkdtemp()
-        os.chdir(self.temp_dir)
+        self.temp_dir = make_temp_dir()
+        self.script_path = os.path.join(self.temp_dir, 'run_analysis.py')
+        self.excel_path = os.path.join(self.temp_dir, 'data', 'purchase_price.xlsx')
         
         # Create test data
         self.create_test_data()
 
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        self._cleanup_temp_dir()
-
-    def _cleanup_temp_dir(self):
-        """Helper method to clean up temp directory."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
     def create_test_data(self):
         """Create test data files."""
-        os.makedirs('data', exist_ok=True)
-        
-        # Copy the run_analysis.py and src files to temp directory for testing
-        project_root = Path(__file__).parent.parent
+        os.makedirs(os.path.dirname(self.excel_path), exist_ok=True)
         
         # Create a simple version of the files for command line testing
-        with open('run_analysis.py', 'w') as f:
+        with open(self.script_path, 'w') as f:
             f.write('''#!/usr/bin/env python3
 import sys
-import os
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent / "src"))
@@ -236,8 +219,9 @@ def main():
     print("🚀 Starting Purchase Price Analysis...")
     print("=" * 50)
     
-    if not os.path.exists("data/purchase_price.xlsx"):
-        print("❌ Excel file not found: data/purchase_price.xlsx")
+    excel_path = Path(__file__).parent / "data" / "purchase_price.xlsx"
+    if not excel_path.is_file():
+        print(f"❌ Excel file not found: {excel_path}")
         return
     
     print("✅ Analysis completed successfully!")
@@ -259,37 +243,34 @@ if __name__ == "__main__":
             'Kosten': [95.0, 150.0]
         })
         
-        with pd.ExcelWriter('data/purchase_price.xlsx', engine='openpyxl') as writer:
-            tabelle1_data.to_excel(writer, sheet_name='Tabelle1', index=False)
-            bestand_data.to_excel(writer, sheet_name='Bestand Odoo', index=False)
+        write_workbook(self.excel_path, {'Tabelle1': tabelle1_data, 'Bestand Odoo': bestand_data})
+
+    def _run_script(self):
+        """Run run_analysis.py as __main__ in this process and return its output."""
+        buf = io.StringIO()
+        with patch.object(sys, 'path', sys.path[:]), contextlib.redirect_stdout(buf):
+            runpy.run_path(self.script_path, run_name='__main__')
+        return buf.getvalue()
 
     def test_command_line_execution(self):
         """Test that run_analysis.py can be executed from command line."""
         # Execute the script
-        result = subprocess.run([
-            sys.executable, 'run_analysis.py'
-        ], capture_output=True, text=True)
-        
-        # Check that it executed successfully
-        self.assertEqual(result.returncode, 0)
+        output = self._run_script()
         
         # Check output contains expected messages
-        self.assertIn("Starting Purchase Price Analysis", result.stdout)
-        self.assertIn("Analysis completed successfully", result.stdout)
+        self.assertIn("Starting Purchase Price Analysis", output)
+        self.assertIn("Analysis completed successfully", output)
 
     def test_command_line_execution_without_excel(self):
         """Test command line execution when Excel file is missing."""
         # Remove Excel file
-        os.remove('data/purchase_price.xlsx')
+        os.remove(self.excel_path)
         
         # Execute the script
-        result = subprocess.run([
-            sys.executable, 'run_analysis.py'
-        ], capture_output=True, text=True)
+        output = self._run_script()
         
         # Should complete but with file not found message
-        self.assertEqual(result.returncode, 0)
-        self.assertIn("Excel file not found", result.stdout)
+        self.assertIn("Excel file not found", output)
 
 
 class TestRunAnalysisIntegration(unittest.TestCase):
@@ -297,48 +278,42 @@ class TestRunAnalysisIntegration(unittest.TestCase):
 
     def setUp(self):
         """Set up integration test fixtures."""
-        self.original_cwd = os.getcwd()
-        self.temp_dir = tempfile.mkdtemp()
-        os.chdir(self.temp_dir)
-
-    def tearDown(self):
-        """Clean up integration test fixtures."""
-        os.chdir(self.original_cwd)
-        self._cleanup_temp_dir()
-
-    def _cleanup_temp_dir(self):
-        """Helper method to clean up temp directory."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
-    @patch('builtins.print')
-    def test_full_integration_workflow(self, mock_print):
+        self.temp_dir = make_temp_dir()
+        self.data_dir = os.path.join(self.temp_dir, 'data')
+        self.excel_path = os.path.join(self.data_dir, 'purchase_price.xlsx')
+        self.output_path = os.path.join(self.data_dir, 'final_purchase_price.csv')
+        self.log_path = os.path.join(self.temp_dir, 'price_analysis.log')
+
+    @slow
+    def test_full_integration_workflow(self):
         """Test the complete integration workflow."""
         # Start with no Excel file (should create sample data)
-        run_analysis.main()
+        with self.assertLogs('run_analysis', level='INFO') as logs:
+            run_analysis.main(self.data_dir, self.log_path)
         
         # Verify all expected files were created
-        self.assertTrue(os.path.exists('data/purchase_price.xlsx'))
-        self.assertTrue(os.path.exists('data/final_purchase_price.csv'))
-        self.assertTrue(os.path.exists('price_analysis.log'))
+        self.assertTrue(os.path.exists(self.excel_path))
+        self.assertTrue(os.path.exists(self.output_path))
+        self.assertTrue(os.path.exists(self.log_path))
         
         # Verify output file has correct structure
-        output_df = pd.read_csv('data/final_purchase_price.csv')
+        output_df = pd.read_csv(self.output_path)
         self.assertIn('article_number', output_df.columns)
         self.assertIn('price', output_df.columns)
         self.assertIn('source', output_df.columns)
         
         # Verify log file has content
-        with open('price_analysis.log', 'r') as f:
+        with open(self.log_path, 'r') as f:
             log_content = f.read()
             self.assertIn('INFO', log_content)
         
-        print_calls = [str(call) for call in mock_print.call_args_list]
+        all_output = '\n'.join(logs.output)
         
-        # Should have all expected print messages
-        self.assertTrue(any("Starting Purchase Price Analysis" in call for call in print_calls))
-        self.assertTrue(any("Creating sample data" in call for call in print_calls))
-        self.assertTrue(any("Sample data created successfully" in call for call in print_calls))
-        self.assertTrue(any("Analysis completed successfully" in call for call in print_calls))
+        # Should have all expected log messages
+        self.assertIn("Starting Purchase Price Analysis", all_output)
+        self.assertIn("Creating sample data", all_output)
+        self.assertIn("Sample data created successfully", all_output)
+        self.assertIn("Analysis completed successfully", all_output)
 
 
 if __name__ == '__main__':